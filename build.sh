@@ -1,5 +1,5 @@
 #!/bin/bash
 
 # Run the static site generator with production base path
-python3 src/main.py "/static_site/"
+python3 src/main.py build "/static_site/"
 
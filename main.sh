@@ -3,10 +3,5 @@
 # Exit if any command fails
 set -e
 
-# Run site generation
-python3 src/main.py
-
-# Change to public directory and start server
-cd public
-echo "Serving site at http://localhost:8888"
-python3 -m http.server 8888
+# Build the site, then serve docs/ with live reload, rebuilding on every change
+python3 src/main.py build --watch --port 8888
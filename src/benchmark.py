@@ -0,0 +1,765 @@
+import argparse
+import json
+import os
+import pickle
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from incremental import MANIFEST_FILE, build_site
+from inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from tree_cache import TreeCache
+import markdown_parser
+from markdown_blocks import block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from markdown_parser import generate_page
+from textnode import TextNode, TextType
+from tree_codec import decode_tree, encode_tree
+
+DEFAULT_BLOCK_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "code": 1,
+    "quote": 1,
+    "ulist": 1,
+    "olist": 1,
+}
+DEFAULT_THRESHOLD = 0.10
+# Wall time a no-op CLI invocation should stay under
+STARTUP_TARGET_MS = 30
+STARTUP_COMMANDS = {
+    "help": ["--help"],
+    "list": ["list"],
+    "check": ["check"],
+    "noop_build": ["build", "--incremental"],
+}
+PARSER_MODULES = ("markdown_blocks", "inline_markdown", "htmlnode")
+BENCH_TEMPLATE = """<!doctype html>
+<html>
+  <head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head>
+  <body><article>{{ Content }}</article></body>
+</html>
+"""
+WORDS = (
+    "the quick brown fox jumps over lazy dog middle earth ring bearer fellowship "
+    "river mountain forest tower shadow light journey road elven dwarven wizard"
+).split()
+
+
+def best_time(func, *args, repeat=5):
+    """
+    Returns the fastest of repeat wall-clock runs of func(*args), in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def split_pass_textnodes(text):
+    # The previous text_to_textnodes: one full split pass per syntax element
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def link_heavy_paragraph(link_count):
+    return " ".join(
+        f"See **item {i}** in [the docs](https://example.com/docs/{i}) or `code{i}`."
+        for i in range(link_count)
+    )
+
+
+def bench_inline(link_counts=(10, 100, 500, 1000), repeat=5):
+    results = []
+    for link_count in link_counts:
+        text = link_heavy_paragraph(link_count)
+        split_pass = best_time(split_pass_textnodes, text, repeat=repeat)
+        single_pass = best_time(text_to_textnodes, text, repeat=repeat)
+        results.append(
+            {
+                "links": link_count,
+                "split_pass_ms": split_pass * 1000,
+                "single_pass_ms": single_pass * 1000,
+                "speedup": split_pass / single_pass,
+            }
+        )
+    return results
+
+
+def resplit_nodes_link(old_nodes):
+    # The previous split_nodes_link: findall with a pattern string, then one
+    # str.split of the rebuilt literal per link
+    new_nodes = []
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.TEXT:
+            new_nodes.append(old_node)
+            continue
+        original_text = old_node.text
+        links = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", original_text)
+        if len(links) == 0:
+            new_nodes.append(old_node)
+            continue
+        for link in links:
+            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
+            original_text = sections[1]
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.TEXT))
+    return new_nodes
+
+
+def bench_extract(link_counts=(10, 100, 1000, 5000), repeat=5):
+    results = []
+    for link_count in link_counts:
+        nodes = [TextNode(link_heavy_paragraph(link_count), TextType.TEXT)]
+        resplit = best_time(resplit_nodes_link, nodes, repeat=repeat)
+        sliced = best_time(split_nodes_link, nodes, repeat=repeat)
+        results.append(
+            {
+                "links": link_count,
+                "resplit_ms": resplit * 1000,
+                "sliced_ms": sliced * 1000,
+                "speedup": resplit / sliced,
+            }
+        )
+    return results
+
+
+def unescaped_html(node):
+    # The previous serializer: raw leaf values, props rebuilt per node and
+    # a nested generator per leaf
+    def props_html(props):
+        if props is None:
+            return ""
+        html = ""
+        for prop in props:
+            html += f' {prop}="{props[prop]}"'
+        return html
+
+    def leaf_html(node):
+        if node.tag is None:
+            yield node.value
+        else:
+            yield f"<{node.tag}{props_html(node.props)}>{node.value}</{node.tag}>"
+
+    def walk(node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is str:
+                yield node
+            elif isinstance(node, ParentNode):
+                yield f"<{node.tag}{props_html(node.props)}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield from leaf_html(node)
+
+    return "".join(walk(node))
+
+
+def bench_escape(blocks=400, link_density=0.05, repeat=5):
+    """
+    Times serializing a synthetic page with escaping and cached props
+    against the previous unescaped serializer.
+    """
+    markdown = synthetic_page(random.Random(2), blocks, DEFAULT_BLOCK_MIX, link_density)
+    html_node = markdown_to_html_node(markdown)
+    unescaped = best_time(unescaped_html, html_node, repeat=repeat)
+    escaped = best_time(html_node.to_html, repeat=repeat)
+    return [
+        {
+            "blocks": blocks,
+            "unescaped_ms": unescaped * 1000,
+            "escaped_ms": escaped * 1000,
+            "speedup": unescaped / escaped,
+        }
+    ]
+
+
+def bench_tree(block_counts=(20, 200, 1000), link_density=0.05, repeat=5):
+    """
+    Times getting a synthetic page's tree by parsing its markdown and from
+    the page tree cache (one SQLite read and a tree_codec decode), and
+    compares encoded and pickled sizes.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TreeCache(os.path.join(tmp, "cache.sqlite"), 1)
+        for blocks in block_counts:
+            markdown = synthetic_page(random.Random(4), blocks, DEFAULT_BLOCK_MIX, link_density)
+            html_node = cache.tree(markdown, markdown_to_html_node)
+            assert decode_tree(encode_tree(html_node)).to_html() == html_node.to_html()
+            parse = best_time(markdown_to_html_node, markdown, repeat=repeat)
+            tree_hit = best_time(cache.tree, markdown, None, repeat=repeat)
+            rows.append(
+                {
+                    "blocks": blocks,
+                    "parse_ms": parse * 1000,
+                    "tree_cache_ms": tree_hit * 1000,
+                    "speedup": parse / tree_hit,
+                    "encoded_kb": len(encode_tree(html_node)) / 1024,
+                    "pickled_kb": len(pickle.dumps(html_node, pickle.HIGHEST_PROTOCOL)) / 1024,
+                }
+            )
+        cache.close()
+    return rows
+
+
+class DictNode:
+    # The node layout before __slots__: four attributes in a per-instance dict
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def bytes_per_node(factory, count):
+    """
+    Returns the average number of bytes allocated per object by factory(i),
+    not counting the strings passed in.
+    """
+    values = [f"value {i}" for i in range(count)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(value) for value in values]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Discount the list holding the nodes
+    return (after - before - nodes.__sizeof__()) / count
+
+
+def bench_memory(count=100_000):
+    cases = [
+        ("leaf", lambda v: DictNode("b", v), lambda v: LeafNode("b", v)),
+        (
+            "leaf+props",
+            lambda v: DictNode("a", v, None, {"href": v}),
+            lambda v: LeafNode("a", v, {"href": v}),
+        ),
+        ("parent", lambda v: DictNode("p", None, [v]), lambda v: ParentNode("p", [v])),
+        (
+            "text",
+            lambda v: DictTextNode(v, TextType.TEXT),
+            lambda v: TextNode(v, TextType.TEXT),
+        ),
+    ]
+    results = []
+    for name, before, after in cases:
+        before_bytes = bytes_per_node(before, count)
+        after_bytes = bytes_per_node(after, count)
+        results.append(
+            {
+                "node": name,
+                "dict_bytes": before_bytes,
+                "slots_bytes": after_bytes,
+                "saved": 1 - after_bytes / before_bytes,
+            }
+        )
+    return results
+
+
+def synthetic_inline(rng, words, link_density):
+    parts = []
+    for _ in range(words):
+        roll = rng.random()
+        word = rng.choice(WORDS)
+        if roll < link_density:
+            parts.append(f"[{word}](/pages/{rng.randint(0, 999)})")
+        elif roll < link_density + 0.05:
+            parts.append(f"**{word}**")
+        elif roll < link_density + 0.08:
+            parts.append(f"_{word}_")
+        elif roll < link_density + 0.10:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+
+def synthetic_block(rng, kind, link_density):
+    if kind == "heading":
+        return "#" * rng.randint(2, 4) + " " + synthetic_inline(rng, 5, 0)
+    if kind == "code":
+        lines = [f"value_{i} = compute({i})" for i in range(rng.randint(2, 8))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "quote":
+        return "\n".join(f"> {synthetic_inline(rng, 12, link_density)}" for _ in range(rng.randint(1, 3)))
+    if kind == "ulist":
+        return "\n".join(f"- {synthetic_inline(rng, 8, link_density)}" for _ in range(rng.randint(2, 6)))
+    if kind == "olist":
+        return "\n".join(
+            f"{i}. {synthetic_inline(rng, 8, link_density)}" for i in range(1, rng.randint(3, 7))
+        )
+    lines = [synthetic_inline(rng, 15, link_density) for _ in range(rng.randint(1, 4))]
+    return "\n".join(lines)
+
+
+def synthetic_page(rng, blocks, block_mix, link_density):
+    kinds = list(block_mix)
+    weights = [block_mix[kind] for kind in kinds]
+    body = [f"# {synthetic_inline(rng, 6, 0)}"]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        body.append(synthetic_block(rng, kind, link_density))
+    return "\n\n".join(body) + "\n"
+
+
+def generate_content(
+    content_dir, pages=100, blocks=40, block_mix=None, link_density=0.05, depth=2, seed=0
+):
+    """
+    Writes a reproducible synthetic content tree: pages markdown files spread
+    over directories up to depth levels deep, each with a title and blocks
+    drawn from block_mix weights, with links making up about link_density of
+    the words.
+    """
+    rng = random.Random(seed)
+    block_mix = block_mix or DEFAULT_BLOCK_MIX
+    for i in range(pages):
+        parts = [f"section{rng.randint(0, 4)}" for _ in range(rng.randint(0, depth))]
+        path = os.path.join(content_dir, *parts, f"page{i}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_page(rng, blocks, block_mix, link_density))
+
+
+def peak_rss_kb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 if sys.platform == "darwin" else 1
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale
+    return max(own, children)
+
+
+def bench_build(pages=200, blocks=40, block_mix=None, link_density=0.05, depth=2, jobs=1):
+    """
+    Times full builds of a synthetic site: cold (empty output and page tree
+    cache), warm (cache filled, every page rendered again), a no-op
+    incremental rebuild and, to show what the cache costs or saves, a full
+    build without it. Returns pages per second for each.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        static = os.path.join(tmp, "static")
+        dest = os.path.join(tmp, "docs")
+        template = os.path.join(tmp, "template.html")
+        cache_path = os.path.join(tmp, "cache", "trees.sqlite")
+        generate_content(content, pages, blocks, block_mix, link_density, depth)
+        os.makedirs(static)
+        with open(os.path.join(static, "index.css"), "w") as f:
+            f.write("body { margin: 0; }")
+        with open(template, "w") as f:
+            f.write(BENCH_TEMPLATE)
+
+        def build(cache_path=cache_path):
+            start = time.perf_counter()
+            build_site(content, static, template, dest, "/", jobs, cache_path)
+            return time.perf_counter() - start
+
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            cold = build()
+            os.remove(os.path.join(dest, MANIFEST_FILE))
+            warm = build()
+            noop = build()
+            shutil.rmtree(dest)
+            uncached = build(None)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        shutil.rmtree(dest)
+    return {
+        "cold_build_pages_per_s": pages / cold,
+        "warm_build_pages_per_s": pages / warm,
+        "noop_build_pages_per_s": pages / noop,
+        "uncached_build_pages_per_s": pages / uncached,
+    }
+
+
+def bench_pipeline(pages=200, blocks=40, jobs=2, read_delay=0.005):
+    """
+    Times rendering a synthetic site with the regular pool and with the
+    pipelined build, with read_delay seconds of latency added to every
+    source read to stand in for slow or network storage.
+    """
+    import pipeline
+
+    def slow_read(read):
+        def read_file(path):
+            time.sleep(read_delay)
+            return read(path)
+
+        return read_file
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        template = os.path.join(tmp, "template.html")
+        generate_content(content, pages, blocks, depth=0)
+        with open(template, "w") as f:
+            f.write(BENCH_TEMPLATE)
+        work = [
+            (os.path.join(content, name, "index.md"), os.path.join(tmp, "docs", name, "index.html"))
+            for name in sorted(os.listdir(content))
+        ]
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        previous = markdown_parser.read_file, pipeline.read_file
+        markdown_parser.read_file = slow_read(previous[0])
+        pipeline.read_file = slow_read(previous[1])
+        try:
+            for mode in ("pool", "pipeline"):
+                start = time.perf_counter()
+                result = markdown_parser.generate_pages(
+                    work, template, jobs=jobs, pipeline=mode == "pipeline"
+                )
+                seconds = time.perf_counter() - start
+                # Failed pages are cheap, so timing them would flatter either mode
+                if result["errors"]:
+                    from_path, error = result["errors"][0]
+                    raise RuntimeError(f"{mode} build failed on {from_path}: {error}")
+                results.append({"mode": mode, "seconds": seconds, "pages_per_s": pages / seconds})
+        finally:
+            markdown_parser.read_file, pipeline.read_file = previous
+            sys.stdout.close()
+            sys.stdout = stdout
+    return results
+
+
+def import_times(stderr):
+    """
+    Parses -X importtime output into {module: (cumulative microseconds,
+    nesting depth)}. Depth 0 modules were imported by the script or the
+    interpreter's startup, so their times add up to the total.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times[name.strip()] = (int(cumulative), depth)
+    return times
+
+
+def bench_startup(pages=50, repeat=10):
+    """
+    Times no-op invocations of main.py against a synthetic site that is
+    already built: the best wall time over repeat runs, the import time
+    -X importtime reports, and whether any of the markdown parser modules
+    were loaded. Bytecode caching is left on, as for anyone running the
+    CLI twice.
+    """
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_content(os.path.join(tmp, "content"), pages, blocks=10)
+        os.makedirs(os.path.join(tmp, "static"))
+        with open(os.path.join(tmp, "template.html"), "w") as f:
+            f.write(BENCH_TEMPLATE)
+
+        def run(*args):
+            return subprocess.run(
+                [sys.executable, *args], cwd=tmp, env=env, capture_output=True, text=True, check=True
+            )
+
+        run(main_path, "build")
+        for name, args in STARTUP_COMMANDS.items():
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run(main_path, *args)
+                best = min(best, time.perf_counter() - start)
+            imports = import_times(run("-X", "importtime", main_path, *args).stderr)
+            rows.append(
+                {
+                    "command": name,
+                    "ms": best * 1000,
+                    "import_ms": sum(us for us, depth in imports.values() if depth == 0) / 1000,
+                    "parser_loaded": any(module in imports for module in PARSER_MODULES),
+                }
+            )
+    return rows
+
+
+def bench_stages(blocks=200, link_density=0.05, repeat=5):
+    """
+    Microbenchmarks each parsing stage on one large synthetic page. Returns
+    throughput in megabytes of markdown per second.
+    """
+    markdown = synthetic_page(random.Random(1), blocks, DEFAULT_BLOCK_MIX, link_density)
+    megabytes = len(markdown.encode("utf-8")) / 1e6
+    parsed_blocks = markdown_to_blocks(markdown)
+    paragraphs = [block for block in parsed_blocks if not block.startswith(("#", "`", ">", "-"))]
+    paragraph_text = "\n".join(paragraphs)
+    html_node = markdown_to_html_node(markdown)
+    timings = {
+        "markdown_to_blocks": best_time(markdown_to_blocks, markdown, repeat=repeat),
+        "block_to_block_type": best_time(
+            lambda: [block_to_block_type(block) for block in parsed_blocks], repeat=repeat
+        ),
+        "text_to_textnodes": best_time(
+            lambda: [text_to_textnodes(p.replace("\n", " ")) for p in paragraphs], repeat=repeat
+        ),
+        "markdown_to_html_node": best_time(markdown_to_html_node, markdown, repeat=repeat),
+        "to_html": best_time(html_node.to_html, repeat=repeat),
+    }
+    sizes = {name: megabytes for name in timings}
+    sizes["text_to_textnodes"] = len(paragraph_text.encode("utf-8")) / 1e6
+    return {f"{name}_mb_per_s": sizes[name] / seconds for name, seconds in timings.items()}
+
+
+def bench_large_page(megabytes=20):
+    """
+    Renders one large synthetic page through the regular in-memory path and
+    the memory-mapped streaming path, reporting time and peak traced memory.
+    """
+    rng = random.Random(2)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "big.md")
+        template = os.path.join(tmp, "template.html")
+        with open(template, "w") as f:
+            f.write(BENCH_TEMPLATE)
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("# Reference\n\n")
+            written = 0
+            while written < megabytes * 1e6:
+                written += f.write(synthetic_page(rng, 50, DEFAULT_BLOCK_MIX, 0.05))
+                f.write("\n")
+        for name, threshold in (("in_memory", float("inf")), ("streamed", 0)):
+            dest = os.path.join(tmp, name, "index.html")
+            previous = markdown_parser.LARGE_FILE_THRESHOLD
+            markdown_parser.LARGE_FILE_THRESHOLD = threshold
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                generate_page(source, template, dest)
+            finally:
+                seconds = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                markdown_parser.LARGE_FILE_THRESHOLD = previous
+            results.append({"path": name, "seconds": seconds, "peak_mb": peak / 1e6})
+    return results
+
+
+def run_suite(pages=200, blocks=40, block_mix=None, link_density=0.05, depth=2, jobs=1, repeat=5):
+    metrics = {}
+    metrics.update(bench_stages(link_density=link_density, repeat=repeat))
+    metrics.update(bench_build(pages, blocks, block_mix, link_density, depth, jobs))
+    return {
+        "config": {
+            "pages": pages,
+            "blocks": blocks,
+            "block_mix": block_mix or DEFAULT_BLOCK_MIX,
+            "link_density": link_density,
+            "depth": depth,
+            "jobs": jobs,
+        },
+        "python": sys.version.split()[0],
+        "metrics": metrics,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares two run_suite results. Every metric is a throughput, so a
+    metric regresses when it falls more than threshold below the baseline.
+    Returns (rows, regressions).
+    """
+    rows = []
+    regressions = []
+    for name, before in sorted(baseline["metrics"].items()):
+        after = current["metrics"].get(name)
+        if after is None:
+            continue
+        change = after / before - 1
+        rows.append({"metric": name, "baseline": before, "current": after, "change": change})
+        if change < -threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def parse_block_mix(text):
+    block_mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_BLOCK_MIX:
+            raise argparse.ArgumentTypeError(f"unknown block type: {kind}")
+        block_mix[kind] = float(weight)
+    return block_mix
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(rows):
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = {}
+    for column in columns:
+        cells = [f"{row[column]:.3f}" if isinstance(row[column], float) else str(row[column]) for row in rows]
+        widths[column] = max(len(column), *(len(cell) for cell in cells))
+    print("  ".join(f"{column:<{widths[column]}}" for column in columns))
+    for row in rows:
+        cells = []
+        for column in columns:
+            value = row[column]
+            if isinstance(value, float):
+                cells.append(f"{value:>{widths[column]}.3f}")
+            else:
+                cells.append(f"{value!s:<{widths[column]}}")
+        print("  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the site generator.")
+    subparsers = parser.add_subparsers(dest="suite", required=True)
+
+    inline = subparsers.add_parser("inline", help="single-pass vs split-pass inline tokenizing")
+    inline.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is kept")
+    extract = subparsers.add_parser(
+        "extract", help="offset slicing vs re-splitting in split_nodes_link, failing if slicing is slower"
+    )
+    extract.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is kept")
+    escape = subparsers.add_parser("escape", help="escaping serializer vs the previous unescaped one")
+    escape.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is kept")
+    tree = subparsers.add_parser("tree", help="parsing vs loading cached page trees")
+    tree.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is kept")
+    pipelined = subparsers.add_parser("pipeline", help="pool vs pipelined build with slow source reads")
+    pipelined.add_argument("--pages", type=int, default=200, help="pages in the synthetic site")
+    pipelined.add_argument("-j", "--jobs", type=int, default=2, help="worker processes")
+    pipelined.add_argument(
+        "--read-delay", type=float, default=0.005, help="seconds of latency added to each read"
+    )
+    startup = subparsers.add_parser("startup", help="wall and import time of no-op CLI invocations")
+    startup.add_argument("--repeat", type=int, default=10, help="runs per command, best is kept")
+    startup.add_argument(
+        "--target",
+        type=float,
+        default=STARTUP_TARGET_MS,
+        help=f"fail if a command takes longer, in ms (default: {STARTUP_TARGET_MS})",
+    )
+    subparsers.add_parser("memory", help="bytes per node, dict vs slotted layout")
+    large = subparsers.add_parser("large", help="peak memory rendering one very large page")
+    large.add_argument("--megabytes", type=float, default=20, help="size of the generated page")
+
+    def add_content_options(subparser):
+        subparser.add_argument("--pages", type=int, default=200, help="pages in the synthetic site")
+        subparser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+        subparser.add_argument(
+            "--block-mix",
+            type=parse_block_mix,
+            default=None,
+            help="block weights, e.g. paragraph=6,code=1,ulist=2",
+        )
+        subparser.add_argument("--link-density", type=float, default=0.05, help="fraction of words that are links")
+        subparser.add_argument("--depth", type=int, default=2, help="maximum directory nesting")
+
+    generate = subparsers.add_parser("generate", help="write a synthetic content tree")
+    generate.add_argument("content_dir")
+    add_content_options(generate)
+
+    run = subparsers.add_parser("run", help="stage microbenchmarks and full builds")
+    add_content_options(run)
+    run.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for the builds")
+    run.add_argument("--repeat", type=int, default=5, help="runs per microbenchmark, best is kept")
+    run.add_argument("-o", "--output", help="save results as JSON")
+
+    compare = subparsers.add_parser("compare", help="fail if a result regressed against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"allowed throughput drop as a fraction (default: {DEFAULT_THRESHOLD})",
+    )
+    args = parser.parse_args()
+
+    if args.suite == "inline":
+        print_table(bench_inline(repeat=args.repeat))
+    elif args.suite == "extract":
+        rows = bench_extract(repeat=args.repeat)
+        print_table(rows)
+        # Re-splitting copies the rest of the text once per link, so at the
+        # largest size the gap is wide even on a noisy machine
+        if rows[-1]["speedup"] <= 1.0:
+            sys.exit(f"Offset slicing is not faster than re-splitting at {rows[-1]['links']} links")
+    elif args.suite == "escape":
+        print_table(bench_escape(repeat=args.repeat))
+    elif args.suite == "tree":
+        print_table(bench_tree(repeat=args.repeat))
+    elif args.suite == "pipeline":
+        print_table(bench_pipeline(args.pages, jobs=args.jobs, read_delay=args.read_delay))
+    elif args.suite == "startup":
+        rows = bench_startup(repeat=args.repeat)
+        print_table(rows)
+        slow = [row["command"] for row in rows if row["ms"] > args.target]
+        if slow:
+            sys.exit(f"Slower than {args.target:g} ms: {', '.join(slow)}")
+    elif args.suite == "memory":
+        print_table(bench_memory())
+    elif args.suite == "large":
+        print_table(bench_large_page(args.megabytes))
+    elif args.suite == "generate":
+        generate_content(
+            args.content_dir, args.pages, args.blocks, args.block_mix, args.link_density, args.depth
+        )
+        print(f"Wrote {args.pages} pages to '{args.content_dir}'.")
+    elif args.suite == "run":
+        result = run_suite(
+            args.pages, args.blocks, args.block_mix, args.link_density, args.depth, args.jobs, args.repeat
+        )
+        print_table([{"metric": name, "value": value} for name, value in result["metrics"].items()])
+        print(f"Peak RSS: {result['peak_rss_kb']} KB")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2, sort_keys=True)
+            print(f"Saved results to '{args.output}'.")
+    elif args.suite == "compare":
+        rows, regressions = compare_results(load_json(args.baseline), load_json(args.current), args.threshold)
+        print_table(rows)
+        if regressions:
+            sys.exit(f"Throughput regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import mimetypes
+import os
+import time
+from urllib.parse import unquote, urlsplit
+
+POLL_INTERVAL = 0.1
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = (
+    "<script>new EventSource('" + RELOAD_PATH + "')"
+    ".addEventListener('reload', () => location.reload());</script>"
+)
+
+
+def snapshot(paths):
+    """
+    Returns {path: (mtime_ns, size)} for every file under the given files
+    and directories. Comparing two snapshots tells which sources changed.
+    """
+    state = {}
+    stack = list(paths)
+    while stack:
+        path = stack.pop()
+        try:
+            if os.path.isdir(path):
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            stat = entry.stat()
+                            state[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            else:
+                stat = os.stat(path)
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            continue
+    return state
+
+
+def changed_paths(old, new):
+    return sorted(path for path in old.keys() | new.keys() if old.get(path) != new.get(path))
+
+
+class DevServer:
+    """
+    Serves root_dir over HTTP and pushes a "reload" server-sent event to
+    every open page whenever reload() is called. HTML responses get a small
+    script injected that listens for the event.
+    """
+
+    def __init__(self, root_dir, host="localhost", port=8888):
+        self.root_dir = os.path.abspath(root_dir)
+        self.host = host
+        self.port = port
+        self.clients = set()
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        return self.server
+
+    def reload(self):
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+                continue
+            try:
+                writer.write(b"event: reload\ndata: reload\n\n")
+            except (ConnectionError, RuntimeError):
+                self.clients.discard(writer)
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] not in ("GET", "HEAD"):
+                await self.respond(writer, 405, b"Method Not Allowed")
+                return
+            path = unquote(urlsplit(parts[1]).path)
+            if path == RELOAD_PATH:
+                await self.subscribe(writer)
+                return
+            body, content_type = self.load(path)
+            if body is None:
+                await self.respond(writer, 404, b"Not Found")
+                return
+            await self.respond(writer, 200, b"" if parts[0] == "HEAD" else body, content_type)
+        except ConnectionError:
+            pass
+        finally:
+            if writer not in self.clients:
+                writer.close()
+
+    async def subscribe(self, writer):
+        self.clients.add(writer)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        await writer.drain()
+
+    def resolve(self, path):
+        # Map a URL path to a file inside root_dir, refusing to leave it
+        full_path = os.path.realpath(os.path.join(self.root_dir, path.lstrip("/")))
+        if full_path != self.root_dir and not full_path.startswith(self.root_dir + os.sep):
+            return None
+        if os.path.isdir(full_path):
+            full_path = os.path.join(full_path, "index.html")
+        if not os.path.isfile(full_path):
+            return None
+        return full_path
+
+    def load(self, path):
+        full_path = self.resolve(path)
+        if full_path is None:
+            return None, None
+        with open(full_path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        if content_type == "text/html":
+            body = inject_reload_script(body)
+            content_type = "text/html; charset=utf-8"
+        return body, content_type
+
+    async def respond(self, writer, status, body, content_type="text/plain; charset=utf-8"):
+        reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Cache-Control: no-cache\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+
+def inject_reload_script(html):
+    script = RELOAD_SCRIPT.encode("utf-8")
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + script
+    return html[:index] + script + html[index:]
+
+
+async def watch(paths, rebuild, server, interval=POLL_INTERVAL):
+    """
+    Polls the files and directories paths() returns and, when anything
+    under them changes, runs rebuild(changed) in a worker thread and tells
+    connected browsers to reload. paths() is asked again after every
+    rebuild, so the watched set can follow what the build used.
+    """
+    watched = paths()
+    state = snapshot(watched)
+    while True:
+        await asyncio.sleep(interval)
+        new_state = snapshot(watched)
+        changed = changed_paths(state, new_state)
+        if not changed:
+            continue
+        state = new_state
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(rebuild, changed)
+        except Exception as e:
+            print(f"Rebuild failed: {type(e).__name__}: {e}")
+            continue
+        fresh = paths()
+        if fresh != watched:
+            # Newly watched files start out unchanged; the rest keep their
+            # state from before the rebuild, so edits made during it count
+            state = {path: state.get(path, stat) for path, stat in snapshot(fresh).items()}
+            watched = fresh
+        print(f"Rebuilt after {len(changed)} change(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+        server.reload()
+
+
+async def serve_and_watch(root_dir, paths, rebuild, host="localhost", port=8888):
+    server = DevServer(root_dir, host, port)
+    await server.start()
+    print(f"Serving {root_dir} at http://{host}:{port} (watching {', '.join(paths())})")
+    async with server.server:
+        await watch(paths, rebuild, server)
+
+
+def run(root_dir, paths, rebuild, host="localhost", port=8888):
+    try:
+        asyncio.run(serve_and_watch(root_dir, paths, rebuild, host, port))
+    except KeyboardInterrupt:
+        pass
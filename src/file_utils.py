@@ -1,34 +1,292 @@
+import filecmp
+import hashlib
+import mmap
 import os
 import shutil
 
+SYNC_JOBS = 8
+
+
 def copy_recursive(src, dest):
-    # Step 1: If dest exists, clear it entirely
-    if os.path.exists(dest):
-        shutil.rmtree(dest)
-        print(f"Deleted existing contents of: {dest}")
-
-    # Step 2: Recreate the destination directory
-    os.makedirs(dest)
-    print(f"Created destination directory: {dest}")
-
-    # Step 3: Walk through all items in source
-    for item in os.listdir(src):
-        s_item = os.path.join(src, item)
-        d_item = os.path.join(dest, item)
-
-        if os.path.isdir(s_item):
-            # Recurse into subdirectories
-            copy_recursive(s_item, d_item)
-        else:
-            # Copy file and log the path
-            shutil.copy2(s_item, d_item)
-            print(f"Copied file: {s_item} -> {d_item}")
+    # Mirror src into dest, only copying files that changed and removing
+    # files that are no longer in src
+    result = sync_tree(src, dest)
+    print(
+        f"Synced {src} -> {dest}: copied {len(result['copied'])}, "
+        f"removed {len(result['removed'])} files."
+    )
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_tree(dir_path):
+    """
+    Returns {relative_path: os.stat_result} for every file under dir_path.
+    """
+    files = {}
+    if not os.path.isdir(dir_path):
+        return files
+    stack = [dir_path]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                else:
+                    files[os.path.relpath(entry.path, dir_path)] = entry.stat()
+    return files
+
+
+def remove_output(path, dest_dir):
+    """
+    Deletes an output file and prunes any directories it leaves empty,
+    stopping at dest_dir.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    parent = os.path.dirname(path)
+    dest_dir = os.path.abspath(dest_dir)
+    while os.path.abspath(parent) != dest_dir and os.path.isdir(parent):
+        if os.listdir(parent):
+            break
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+def sync_tree(src, dest, previous=None, checksum=False, jobs=SYNC_JOBS, dry_run=False):
+    """
+    Makes dest hold the same files as src, rsync style. A file is copied only
+    when its size or mtime differs from the copy in dest (or, with checksum,
+    when its contents differ too). Files listed in previous but gone from
+    src are removed; without previous, any file in dest that is not in src
+    is. Files are hardlinked when src and dest share a filesystem, and copied
+    on a thread pool otherwise. With dry_run nothing is touched and the
+    result only says what would be copied and removed.
+    """
+    current = list_tree(src)
+    if previous is None:
+        previous = list_tree(dest)
+    removed = sorted(set(previous) - set(current))
+
+    changed = []
+    for relative_path, src_stat in current.items():
+        dest_path = os.path.join(dest, relative_path)
+        try:
+            dest_stat = os.stat(dest_path)
+        except FileNotFoundError:
+            changed.append(relative_path)
+            continue
+        if dest_stat.st_size != src_stat.st_size:
+            changed.append(relative_path)
+        elif dest_stat.st_mtime_ns != src_stat.st_mtime_ns:
+            if checksum and hash_file(os.path.join(src, relative_path)) == hash_file(dest_path):
+                # Same bytes: adopt the source mtime so the quick check passes next time
+                if not dry_run:
+                    shutil.copystat(os.path.join(src, relative_path), dest_path)
+                continue
+            changed.append(relative_path)
+    changed.sort()
+    if dry_run:
+        return {"copied": changed, "removed": removed, "files": sorted(current)}
+
+    os.makedirs(dest, exist_ok=True)
+    link = os.path.isdir(src) and os.stat(src).st_dev == os.stat(dest).st_dev
+
+    for directory in {os.path.dirname(relative_path) for relative_path in changed}:
+        os.makedirs(os.path.join(dest, directory), exist_ok=True)
+
+    def sync_file(relative_path):
+        src_path = os.path.join(src, relative_path)
+        dest_path = os.path.join(dest, relative_path)
+        # Never write through an existing file: it may be a hardlink
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        if link:
+            try:
+                os.link(src_path, dest_path)
+                return
+            except OSError:
+                pass
+        shutil.copy2(src_path, dest_path)
+
+    if len(changed) > 1 and jobs > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(sync_file, changed))
+    else:
+        for relative_path in changed:
+            sync_file(relative_path)
+
+    for relative_path in removed:
+        remove_output(os.path.join(dest, relative_path), dest)
+
+    return {"copied": changed, "removed": removed, "files": sorted(current)}
 
 
 def read_file(path):
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
+def iter_mapped_lines(path):
+    """
+    Yields the lines of a UTF-8 file without their line endings, reading
+    through a memory map so only the current line is ever copied into a
+    Python string.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < size:
+                end = mapped.find(b"\n", start)
+                if end == -1:
+                    end = size
+                line = mapped[start:end]
+                start = end + 1
+                if line.endswith(b"\r"):
+                    line = line[:-1]
+                yield line.decode("utf-8")
+
 def write_file(path, content):
     with open(path, "w", encoding="utf-8") as f:
         f.write(content)
+
+
+
+class OutputWriter:
+    """
+    Writes build outputs atomically, through a temporary file renamed over
+    the destination, and leaves files whose bytes would not change alone so
+    their mtimes stay put. Missing directories are created on the first
+    write that needs them rather than checked before every write. Counts
+    written and skipped files.
+    """
+
+    def __init__(self, buffer_limit=4 * 1024 * 1024):
+        self.buffer_limit = buffer_limit
+        self.written = 0
+        self.skipped = 0
+
+    def write(self, path, content):
+        self.write_bytes(path, content.encode("utf-8"))
+
+    def write_bytes(self, path, data):
+        if same_content(path, data):
+            self.skipped += 1
+            return
+        fd, temp_path = self._make_temp(path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            _discard(temp_path)
+            raise
+        self.written += 1
+
+    def write_chunks(self, path, chunks):
+        """
+        Writes an iterable of strings. Small outputs are buffered and
+        compared in memory; past buffer_limit the rest is streamed to the
+        temporary file, which is then compared with the existing file.
+        """
+        chunks = iter(chunks)
+        buffered = []
+        size = 0
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            buffered.append(data)
+            size += len(data)
+            if size > self.buffer_limit:
+                break
+        else:
+            self.write_bytes(path, b"".join(buffered))
+            return
+
+        fd, temp_path = self._make_temp(path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.writelines(buffered)
+                del buffered
+                for chunk in chunks:
+                    f.write(chunk.encode("utf-8"))
+            if same_file_content(temp_path, path):
+                _discard(temp_path)
+                self.skipped += 1
+                return
+            os.replace(temp_path, path)
+        except BaseException:
+            _discard(temp_path)
+            raise
+        self.written += 1
+
+    def _make_temp(self, path):
+        import tempfile
+
+        directory, name = os.path.split(path)
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+        except FileNotFoundError:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+        # mkstemp files are private; give outputs the usual permissions
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+        return fd, temp_path
+
+
+def sweep_temp_files(dest_dir):
+    """
+    Removes the temporary files an OutputWriter left under dest_dir when
+    its process was killed mid-write. Returns how many there were.
+    """
+    removed = 0
+    for relative_path in list_tree(dest_dir):
+        name = os.path.basename(relative_path)
+        if name.startswith(".") and name.endswith(".tmp"):
+            _discard(os.path.join(dest_dir, relative_path))
+            removed += 1
+    return removed
+
+
+def same_content(path, data):
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def same_file_content(path, other_path):
+    try:
+        if os.stat(path).st_size != os.stat(other_path).st_size:
+            return False
+    except FileNotFoundError:
+        return False
+    return filecmp.cmp(path, other_path, shallow=False)
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _current_umask()
@@ -0,0 +1,8 @@
+import os
+
+
+def write(path, content):
+    """Writes content to path as UTF-8, creating missing parent directories."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
@@ -0,0 +1,57 @@
+FENCES = {"---": ":", "+++": "="}
+
+
+def split_front_matter(markdown):
+    """
+    Splits optional front matter off the top of a markdown string. Returns
+    (metadata dict, remaining markdown). Front matter is fenced by "---"
+    lines with "key: value" pairs (YAML style) or by "+++" lines with
+    "key = value" pairs (TOML style).
+    """
+    if not markdown.startswith(tuple(FENCES)):
+        return {}, markdown
+    lines = markdown.split("\n")
+    meta, rest = read_front_matter(iter(lines))
+    return meta, "\n".join(rest)
+
+
+def read_front_matter(lines):
+    """
+    Reads front matter from an iterator of lines. Returns (metadata dict,
+    iterator over the remaining lines).
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    fence = first.strip()
+    if fence not in FENCES:
+        return {}, _chain(first, lines)
+    separator = FENCES[fence]
+    meta = {}
+    for line in lines:
+        if line.strip() == fence:
+            return meta, lines
+        key, found, value = line.partition(separator)
+        if not found or not key.strip():
+            continue
+        meta[key.strip().lower()] = parse_value(value.strip())
+    raise ValueError(f"invalid front matter: no closing '{fence}'")
+
+
+def parse_value(value):
+    if value.startswith("[") and value.endswith("]"):
+        items = [item.strip() for item in value[1:-1].split(",")]
+        return [_unquote(item) for item in items if item]
+    return _unquote(value)
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def _chain(first, lines):
+    yield first
+    yield from lines
@@ -1,19 +1,69 @@
+import sys
+
+# One translate table serves text and attribute values alike
+ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+# Serialized attributes by props items; the same hrefs repeat across pages
+PROPS_CACHE_SIZE = 4096
+_props_cache = {}
+
+
+def escape_html(text):
+    """
+    Escapes &, <, > and " for use in HTML text or a quoted attribute value.
+    Most strings contain none of them and are returned as they are.
+    """
+    if "&" in text or "<" in text or ">" in text or '"' in text:
+        return text.translate(ESCAPE_TABLE)
+    return text
+
+
 class HTMLNode:
+    # Pages create tens of thousands of nodes: no per-instance __dict__, tag
+    # names interned, and None as the one shared "no props" value
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
-        self.tag = tag
+        self.tag = sys.intern(tag) if tag is not None else None
         self.value = value
         self.children = children
-        self.props = props
+        self.props = props if props else None
 
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def iter_html(self):
+        """
+        Yields the node's HTML in chunks, so callers can stream a large tree
+        to a file without building the whole string first.
+        """
+        yield self.to_html()
+
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
+
+    def iter_text(self):
+        """
+        Yields the text of every leaf in the subtree, in document order.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.children:
+                stack.extend(reversed(node.children))
+            elif node.value:
+                yield node.value
+
     def props_to_html(self):
         if self.props is None:
             return ""
-        props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
+        key = tuple(self.props.items())
+        props_html = _props_cache.get(key)
+        if props_html is None:
+            props_html = "".join(f' {prop}="{escape_html(str(value))}"' for prop, value in key)
+            if len(_props_cache) >= PROPS_CACHE_SIZE:
+                _props_cache.clear()
+            _props_cache[key] = props_html
         return props_html
 
     def __repr__(self):
@@ -21,33 +71,58 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
     def to_html(self):
         if self.value is None:
             raise ValueError("invalid HTML: no value")
+        value = self.value
+        # escape_html inlined: most leaves are plain text and this is hot
+        if "&" in value or "<" in value or ">" in value or '"' in value:
+            value = value.translate(ESCAPE_TABLE)
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        if self.props is None:
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
-        if self.tag is None:
-            raise ValueError("invalid HTML: no tag")
-        if self.children is None:
-            raise ValueError("invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        # Walk the subtree with an explicit stack of nodes and pending closing
+        # tags, so output is linear in its size whatever the nesting depth
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node_class = node.__class__
+            if node_class is str:
+                yield node
+            elif node_class is LeafNode:
+                yield node.to_html()
+            elif isinstance(node, ParentNode):
+                if node.tag is None:
+                    raise ValueError("invalid HTML: no tag")
+                if node.children is None:
+                    raise ValueError("invalid HTML: no children")
+                yield f"<{node.tag}{node.props_to_html()}>" if node.props else f"<{node.tag}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield from node.iter_html()
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
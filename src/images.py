@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import struct
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from file_utils import hash_file, list_tree
+
+IMAGE_INDEX_FILE = ".image_index.json"
+IMAGE_INDEX_VERSION = 1
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+# Widths of the WebP variants made for images wider than them
+VARIANT_WIDTHS = (480, 960)
+VARIANT_QUALITY = 80
+
+
+def image_size(path):
+    """
+    Returns (width, height) read from the header of a PNG, GIF, JPEG or WebP
+    file, or None for anything else, including headers cut short.
+    """
+    with open(path, "rb") as f:
+        head = f.read(32)
+        try:
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                return _webp_size(head)
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                return _jpeg_size(f)
+        except struct.error:
+            # Too few bytes left to unpack
+            return None
+    return None
+
+
+def _webp_size(head):
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def _jpeg_size(f):
+    # Walk the marker segments up to the first start-of-frame
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if length < 2:
+            # Seeking back onto the marker would loop forever
+            return None
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def variant_path(relative_path, digest, width):
+    # Keyed by content hash, so a changed image gets new URLs
+    stem = os.path.splitext(relative_path)[0]
+    return f"{stem}-{digest[:12]}-{width}.webp"
+
+
+def make_variants(args):
+    """
+    Writes the resized WebP variants of one image into cache_dir, named by
+    content hash, unless they are there from an earlier build. Returns
+    [(file name in cache_dir, width)].
+    """
+    source, cache_dir, digest, widths = args
+    missing = [
+        width for width in widths if not os.path.exists(_cached_variant(cache_dir, digest, width))
+    ]
+    if missing:
+        os.makedirs(cache_dir, exist_ok=True)
+        with Image.open(source) as image:
+            for width in missing:
+                height = max(1, round(image.height * width / image.width))
+                path = _cached_variant(cache_dir, digest, width)
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                resized = image.resize((width, height), Image.LANCZOS)
+                resized.save(temp_path, "WEBP", quality=VARIANT_QUALITY)
+                os.replace(temp_path, path)
+    return [(os.path.basename(_cached_variant(cache_dir, digest, width)), width) for width in widths]
+
+
+def _cached_variant(cache_dir, digest, width):
+    return os.path.join(cache_dir, f"{digest}-{width}.webp")
+
+
+def process_images(static_dir, dest_dir, previous, cache_dir, jobs=1):
+    """
+    Brings the image index up to date with the images under static_dir.
+    Every image gets its intrinsic size recorded; when Pillow is installed
+    and a cache_dir is given, ones wider than a VARIANT_WIDTHS entry also
+    get WebP variants, rendered on a pool of jobs processes into cache_dir
+    and placed next to the original in dest_dir. Images whose size and
+    mtime match previous are not looked at again. Returns (index, relative paths of the images that
+    were added, changed or removed).
+    """
+    files = {
+        path: stat
+        for path, stat in list_tree(static_dir).items()
+        if path.lower().endswith(IMAGE_EXTENSIONS)
+    }
+    resizing = Image is not None and cache_dir is not None
+    widths_wanted = VARIANT_WIDTHS if resizing else ()
+    index = {}
+    jobs_todo = []
+    for relative_path, stat in sorted(files.items()):
+        old = previous.get(relative_path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        if old is not None and old["stat"] == signature and old["resized"] == resizing:
+            index[relative_path] = old
+            continue
+        source = os.path.join(static_dir, relative_path)
+        digest = hash_file(source)
+        if old is not None and old["hash"] == digest and old["resized"] == resizing:
+            index[relative_path] = dict(old, stat=signature)
+            continue
+        size = image_size(source)
+        entry = {
+            "stat": signature,
+            "hash": digest,
+            "resized": resizing,
+            "width": size[0] if size else None,
+            "height": size[1] if size else None,
+            "variants": [],
+        }
+        index[relative_path] = entry
+        widths = [width for width in widths_wanted if size and width < size[0]]
+        if widths:
+            jobs_todo.append((relative_path, (source, cache_dir, digest, widths)))
+
+    if jobs > 1 and len(jobs_todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(make_variants, [args for _, args in jobs_todo]))
+    else:
+        results = [make_variants(args) for _, args in jobs_todo]
+    for (relative_path, args), variants in zip(jobs_todo, results):
+        digest = args[2]
+        for name, width in variants:
+            target = os.path.join(dest_dir, variant_path(relative_path, digest, width))
+            _place(os.path.join(cache_dir, name), target)
+            index[relative_path]["variants"].append([variant_path(relative_path, digest, width), width])
+
+    # Drop variants of images that changed or disappeared
+    for relative_path, old in previous.items():
+        keep = {variant for variant, width in index.get(relative_path, {}).get("variants", [])}
+        for variant, width in old["variants"]:
+            if variant not in keep:
+                try:
+                    os.remove(os.path.join(dest_dir, variant))
+                except FileNotFoundError:
+                    pass
+
+    changed = {
+        relative_path
+        for relative_path in set(previous) | set(index)
+        if _visible(previous.get(relative_path)) != _visible(index.get(relative_path))
+    }
+    return index, changed
+
+
+def _visible(entry):
+    # The parts of an entry that show up in rendered pages
+    if entry is None:
+        return None
+    return entry["width"], entry["height"], entry["variants"]
+
+
+def _place(source, target):
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def annotate_images(node, images, base_path="/"):
+    """
+    Adds width/height, srcset/sizes for images with variants, and
+    loading="lazy" to every <img> in the tree. images is the image index;
+    src values are matched as written in the content, before base_path is
+    prefixed.
+    """
+    prefix = base_path.rstrip("/")
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.children:
+            stack.extend(node.children)
+            continue
+        if node.tag != "img" or node.props is None:
+            continue
+        src = node.props.get("src", "")
+        entry = images.get(src.lstrip("/").replace("/", os.sep)) if src.startswith("/") else None
+        if entry is not None and entry["width"]:
+            node.props["width"] = str(entry["width"])
+            node.props["height"] = str(entry["height"])
+            if entry["variants"]:
+                candidates = [
+                    f"{prefix}/{path.replace(os.sep, '/')} {width}w" for path, width in entry["variants"]
+                ]
+                candidates.append(f"{prefix}{src} {entry['width']}w")
+                node.props["srcset"] = ", ".join(candidates)
+                node.props["sizes"] = f"(max-width: {entry['width']}px) 100vw, {entry['width']}px"
+        node.props["loading"] = "lazy"
+
+
+def load_image_index(dest_dir):
+    path = os.path.join(dest_dir, IMAGE_INDEX_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != IMAGE_INDEX_VERSION:
+        return {}
+    return index["images"]
+
+
+def save_image_index(dest_dir, images):
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, IMAGE_INDEX_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": IMAGE_INDEX_VERSION, "images": images}, f, indent=2, sort_keys=True)
@@ -0,0 +1,473 @@
+import hashlib
+import json
+import os
+
+from file_utils import OutputWriter, hash_file, list_tree, remove_output, sweep_temp_files, sync_tree
+from page_index import load_page_index, page_url, render_page_list, save_page_index
+
+MANIFEST_FILE = ".manifest.json"
+# Present while a build runs; finding it means the last one was killed
+BUILD_MARKER_FILE = ".building"
+MANIFEST_VERSION = 7
+# Bump whenever the HTML rendered from unchanged sources changes, such as
+# a parser or escaping fix, so the next incremental build redoes every page
+OUTPUT_VERSION = 1
+
+
+def hash_tree(dir_path, extension=None, previous=None):
+    """
+    Returns a {relative_path: content_hash} dict for every file under dir_path,
+    optionally limited to files ending with the given extension, and a
+    {relative_path: [size, mtime_ns]} dict of their stats. Given previous,
+    the (hashes, stats) of an earlier call, a file whose size and mtime are
+    unchanged keeps its hash without being read again.
+    """
+    old_hashes, old_stats = previous or ({}, {})
+    hashes = {}
+    stats = {}
+    for relative_path, stat in list_tree(dir_path).items():
+        if extension is not None and not relative_path.endswith(extension):
+            continue
+        signature = [stat.st_size, stat.st_mtime_ns]
+        if old_stats.get(relative_path) == signature and relative_path in old_hashes:
+            hashes[relative_path] = old_hashes[relative_path]
+        else:
+            hashes[relative_path] = hash_file(os.path.join(dir_path, relative_path))
+        stats[relative_path] = signature
+    return hashes, stats
+
+
+def empty_manifest():
+    return {
+        "version": MANIFEST_VERSION,
+        "output_version": None,
+        "base_path": None,
+        "minify": False,
+        "template_path": None,
+        "templates": {},
+        "pages": {},
+        "page_stats": {},
+        "static": [],
+        "graph": {},
+        "site_url": None,
+        "site_files": [],
+    }
+
+
+def load_manifest(dest_dir):
+    path = os.path.join(dest_dir, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(dest_dir, manifest):
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, MANIFEST_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def page_dest_path(relative_path, dest_dir):
+    return os.path.join(dest_dir, os.path.splitext(relative_path)[0] + ".html")
+
+
+def asset_paths(links, static_dir):
+    """
+    Returns the static files, relative to static_dir, that root-relative
+    links point at. Links to pages or to nothing are left out.
+    """
+    from urllib.parse import unquote, urlsplit
+
+    assets = set()
+    for link in links:
+        relative_path = os.path.normpath(unquote(urlsplit(link).path).lstrip("/"))
+        if relative_path != "." and os.path.isfile(os.path.join(static_dir, relative_path)):
+            assets.add(relative_path)
+    return sorted(assets)
+
+
+def stale_pages(graph, templates):
+    """
+    Returns the pages that depend on a template whose hash differs from the
+    one recorded in templates, the {path: hash} map of the last build.
+    """
+    changed = set()
+    for path, digest in templates.items():
+        current = hash_file(path) if os.path.isfile(path) else None
+        if current != digest:
+            changed.add(path)
+    return {page for page, dependencies in graph.items() if changed & set(dependencies["templates"])}
+
+
+def listing_hash(listing):
+    return hashlib.sha256(listing.encode("utf-8")).hexdigest()
+
+
+def listing_users(graph):
+    return {page for page, dependencies in graph.items() if dependencies["listing"] is not None}
+
+
+def listing_pages(graph, digest):
+    """
+    Returns the pages that fill {{ Pages }} and were rendered with a page
+    list other than the one whose hash is digest.
+    """
+    return sorted(
+        page
+        for page, dependencies in graph.items()
+        if dependencies["listing"] is not None and dependencies["listing"] != digest
+    )
+
+
+def full_rebuild(manifest, template_path, base_path, minify):
+    # Settings that show up in every page; changing one regenerates them all
+    return (
+        manifest["output_version"] != OUTPUT_VERSION
+        or manifest["template_path"] != template_path
+        or manifest["base_path"] != base_path
+        or manifest["minify"] != minify
+    )
+
+
+def outdated_pages(manifest, index, page_hashes, stale, dest_dir, rebuild_all=False):
+    """
+    Returns the sources in page_hashes, relative to the content directory,
+    that a build has to generate: new or edited ones, those in stale and
+    those whose output or page index entry is missing.
+    """
+    return [
+        relative_path
+        for relative_path, digest in sorted(page_hashes.items())
+        if rebuild_all
+        or manifest["pages"].get(relative_path) != digest
+        or relative_path in stale
+        or relative_path not in manifest["graph"]
+        or relative_path not in index
+        or not os.path.exists(page_dest_path(relative_path, dest_dir))
+    ]
+
+
+def build_site(
+    content_dir,
+    static_dir,
+    template_path,
+    dest_dir,
+    base_path="/",
+    jobs=1,
+    cache_path=None,
+    checksum=False,
+    profiler=None,
+    site_url=None,
+    minify=False,
+    compress=False,
+    image_cache_dir=None,
+    pipeline=False,
+):
+    """
+    Brings dest_dir up to date with the sources, only regenerating pages and
+    copying assets that changed since the manifest left by the previous build.
+    Returns what was done, with the page index under "index", the pages that
+    failed under "errors" and internal links to nothing under "broken_links".
+    """
+    from images import load_image_index, process_images, save_image_index
+    from link_checker import check_links, link_paths, linked_paths, output_paths, page_outputs
+    from profiler import profile_phase
+
+    # Only a build killed mid-write leaves temporary files to publish, so
+    # the output tree is only searched for them after one
+    marker = os.path.join(dest_dir, BUILD_MARKER_FILE)
+    if os.path.exists(marker):
+        sweep_temp_files(dest_dir)
+    else:
+        os.makedirs(dest_dir, exist_ok=True)
+        open(marker, "w").close()
+
+    old = load_manifest(dest_dir)
+    index = load_page_index(dest_dir)
+    template_path = os.path.normpath(template_path)
+    rebuild_all = full_rebuild(old, template_path, base_path, minify)
+    graph = old["graph"]
+    stale = stale_pages(graph, old["templates"])
+
+    result = {
+        "generated": [],
+        "copied": [],
+        "removed": [],
+        "errors": [],
+        "written": 0,
+        "skipped": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "index": index,
+    }
+
+    with profile_phase(profiler, "static"):
+        static = sync_tree(static_dir, dest_dir, old["static"], checksum)
+    result["copied"] = [os.path.join(dest_dir, path) for path in static["copied"]]
+    result["removed"] = [os.path.join(dest_dir, path) for path in static["removed"]]
+
+    with profile_phase(profiler, "images"):
+        old_images = load_image_index(dest_dir)
+        images, changed_images = process_images(static_dir, dest_dir, old_images, image_cache_dir, jobs)
+    stale |= {
+        page for page, dependencies in graph.items() if changed_images & set(dependencies["assets"])
+    }
+
+    # Sources with the size and mtime in the manifest keep their hash
+    # without being read, unless checksum asks for every one to be hashed
+    with profile_phase(profiler, "walk"):
+        page_hashes, page_stats = hash_tree(
+            content_dir, ".md", None if checksum else (old["pages"], old["page_stats"])
+        )
+    # URL paths that appeared, went away or may have new anchors; pages
+    # linking to them get their links checked again
+    changed_paths = {
+        "/" + path.replace(os.sep, "/") for path in static["copied"] + static["removed"]
+    }
+    deleted = sorted(set(old["pages"]) - set(page_hashes))
+    for relative_path in deleted:
+        changed_paths.update(page_outputs(page_url(relative_path)))
+        dest_path = page_dest_path(relative_path, dest_dir)
+        remove_output(dest_path, dest_dir)
+        result["removed"].append(dest_path)
+        index.pop(relative_path, None)
+        graph.pop(relative_path, None)
+
+    # Pages whose template has a {{ Pages }} slot list every page. Only the
+    # pages that used it last build are sent the list; any other page that
+    # turns out to use it gets an empty one, and like those whose list
+    # changed once this build's pages are indexed, is redone in a new pass
+    generated = {}
+    rendered = False
+    listing = None
+    outdated = outdated_pages(old, index, page_hashes, stale, dest_dir, rebuild_all)
+    if deleted and listing_users(graph):
+        listing = render_page_list(index, base_path)
+        outdated = sorted(set(outdated) | set(listing_pages(graph, listing_hash(listing))))
+    while outdated:
+        # The markdown parser is only loaded when there is something to render
+        from markdown_parser import generate_pages
+
+        rendered = True
+        users = listing_users(graph) & set(outdated)
+        if users and listing is None:
+            listing = render_page_list(index, base_path)
+        listings = {os.path.join(content_dir, relative_path): listing for relative_path in users}
+        pages = [
+            (os.path.join(content_dir, relative_path), page_dest_path(relative_path, dest_dir))
+            for relative_path in outdated
+        ]
+        outcome = generate_pages(
+            pages, template_path, base_path, jobs, cache_path, profiler, minify, images, pipeline, listings
+        )
+        failed = {from_path for from_path, error in outcome["errors"]}
+        for from_path, dest_path in pages:
+            relative_path = os.path.relpath(from_path, content_dir)
+            changed_paths.update(page_outputs(page_url(relative_path)))
+            if from_path in failed:
+                # A None hash has the next build retry the page, while
+                # keeping it tracked so deleting the source removes any
+                # output an earlier build left
+                page_hashes[relative_path] = None
+                del page_stats[relative_path]
+                index.pop(relative_path, None)
+                graph.pop(relative_path, None)
+                generated.pop(relative_path, None)
+                continue
+            entry = outcome["pages"][from_path]
+            # The templates, partials and assets a page was rendered with let
+            # a later edit to one of them regenerate only the pages using it
+            dependencies = entry.pop("dependencies")
+            graph[relative_path] = {
+                "templates": dependencies["templates"],
+                "assets": asset_paths(dependencies["links"], static_dir),
+                "listing": listing_hash(listings.get(from_path, "")) if dependencies["listing"] else None,
+            }
+            entry["path"] = page_url(relative_path)
+            entry["hash"] = page_hashes[relative_path]
+            entry["targets"] = linked_paths(entry)
+            index[relative_path] = entry
+            generated[relative_path] = dest_path
+        result["errors"] += outcome["errors"]
+        for key in ("written", "skipped", "cache_hits", "cache_misses"):
+            result[key] += outcome[key]
+        listing = None
+        outdated = []
+        if listing_users(graph):
+            listing = render_page_list(index, base_path)
+            outdated = listing_pages(graph, listing_hash(listing))
+    result["generated"] = list(generated.values())
+
+    # The search index, sitemap and feed only follow the pages and site_url
+    site_files = old["site_files"]
+    if (
+        changed_paths
+        or site_url != old["site_url"]
+        or not all(os.path.exists(os.path.join(dest_dir, name)) for name in site_files)
+    ):
+        from site_files import write_site_files
+
+        with profile_phase(profiler, "site_files"):
+            site_paths = write_site_files(index, dest_dir, content_dir, OutputWriter(), base_path, site_url)
+        site_files = sorted(os.path.relpath(path, dest_dir) for path in site_paths)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "output_version": OUTPUT_VERSION,
+        "base_path": base_path,
+        "minify": minify,
+        "template_path": template_path,
+        "templates": {
+            path: hash_file(path)
+            for path in sorted({path for node in graph.values() for path in node["templates"]})
+        },
+        "pages": page_hashes,
+        "page_stats": page_stats,
+        "static": static["files"],
+        "graph": graph,
+        "site_url": site_url,
+        "site_files": site_files,
+    }
+    # graph is the loaded manifest's, edited in place, so it only differs
+    # when pages were generated or deleted
+    if rendered or deleted or manifest != old:
+        save_manifest(dest_dir, manifest)
+
+    # Links were collected from the page trees as they rendered; checking
+    # them is set lookups, redone for changed pages and pages linking to
+    # changed outputs, while other pages keep their earlier results
+    with profile_phase(profiler, "links"):
+        recheck = list(generated)
+        if changed_paths:
+            changed_links = {path for changed in changed_paths for path in link_paths(changed)}
+            recheck += [
+                relative_path
+                for relative_path, entry in index.items()
+                if "broken_links" in entry and not changed_links.isdisjoint(entry["targets"])
+            ]
+        if recheck:
+            outputs = output_paths(
+                index,
+                static["files"],
+                ["/" + name.replace(os.sep, "/") for name in site_files],
+            )
+            for relative_path, broken in check_links(recheck, index, outputs).items():
+                index[relative_path]["broken_links"] = broken
+    result["broken_links"] = [
+        (os.path.join(content_dir, relative_path), line, url, reason)
+        for relative_path, entry in sorted(index.items())
+        for line, url, reason in entry["broken_links"]
+    ]
+    # Entries only change when pages are generated, deleted or rechecked;
+    # rewriting the index otherwise would dominate a no-op build
+    if rendered or deleted or recheck:
+        save_page_index(dest_dir, index)
+    if images != old_images:
+        save_image_index(dest_dir, images)
+    if compress:
+        # .gz (and .br) siblings next to every text output
+        from postprocess import precompress_tree
+
+        with profile_phase(profiler, "compress"):
+            result["compressed"] = precompress_tree(dest_dir)["compressed"]
+    os.remove(marker)
+    return result
+
+
+def explain(path, content_dir, static_dir, dest_dir):
+    """
+    Describes the dependency graph recorded by the last build around path:
+    what a page (given as its source or output) was built from, or which
+    pages a template, partial or static asset would regenerate or affect.
+    Returns a list of lines.
+    """
+    manifest = load_manifest(dest_dir)
+    graph = manifest["graph"]
+    path = os.path.normpath(path)
+    for relative_path, dependencies in sorted(graph.items()):
+        source = os.path.normpath(os.path.join(content_dir, relative_path))
+        if path in (source, os.path.normpath(page_dest_path(relative_path, dest_dir))):
+            lines = [f"{source} -> {page_dest_path(relative_path, dest_dir)}"]
+            lines += [f"  template: {template}" for template in dependencies["templates"]]
+            lines += [f"  asset: {os.path.join(static_dir, asset)}" for asset in dependencies["assets"]]
+            return lines
+
+    if path in manifest["templates"]:
+        kind = "template"
+        users = [page for page, dependencies in graph.items() if path in dependencies["templates"]]
+    else:
+        kind = "asset"
+        asset = os.path.relpath(path, static_dir)
+        users = [page for page, dependencies in graph.items() if asset in dependencies["assets"]]
+    if not users:
+        return [f"{path} is not part of the last build's dependency graph"]
+    lines = [f"{path} ({kind}) is used by {len(users)} page(s):"]
+    lines += [f"  {os.path.join(content_dir, page)}" for page in sorted(users)]
+    return lines
+
+
+def check_site(
+    content_dir, static_dir, template_path, dest_dir, base_path="/", minify=False, checksum=False
+):
+    """
+    Works out what build_site would do with the same arguments, without
+    rendering or writing anything. Returns a dict of "pages" to generate
+    and pages whose source was "deleted", relative to content_dir, and of
+    static files to be "copied" and "removed", relative to static_dir.
+    Pages are only compared by content hash, so the markdown parser is
+    never loaded; pages linking a changed image count as stale even when
+    the build would find its size unchanged.
+    Pages filling {{ Pages }} count as stale whenever another page is
+    generated or deleted, though the build may find the list unchanged.
+    """
+    manifest = load_manifest(dest_dir)
+    index = load_page_index(dest_dir)
+    rebuild_all = full_rebuild(manifest, os.path.normpath(template_path), base_path, minify)
+    static = sync_tree(static_dir, dest_dir, manifest["static"], checksum, dry_run=True)
+    stale = stale_pages(manifest["graph"], manifest["templates"])
+    changed_assets = set(static["copied"]) | set(static["removed"])
+    linked = {
+        page
+        for page, dependencies in manifest["graph"].items()
+        if changed_assets & set(dependencies["assets"])
+    }
+    if linked:
+        # Only images are rendered into the pages that link them
+        from images import IMAGE_EXTENSIONS
+
+        images = {path for path in changed_assets if path.lower().endswith(IMAGE_EXTENSIONS)}
+        stale |= {page for page in linked if images & set(manifest["graph"][page]["assets"])}
+    previous = None if checksum else (manifest["pages"], manifest["page_stats"])
+    page_hashes, page_stats = hash_tree(content_dir, ".md", previous)
+    pages = outdated_pages(manifest, index, page_hashes, stale, dest_dir, rebuild_all)
+    deleted = sorted(set(manifest["pages"]) - set(page_hashes))
+    if pages or deleted:
+        pages = sorted(set(pages) | (set(listing_pages(manifest["graph"], None)) & set(page_hashes)))
+    return {
+        "pages": pages,
+        "deleted": deleted,
+        "copied": static["copied"],
+        "removed": static["removed"],
+    }
+
+
+def list_pages(content_dir, dest_dir):
+    """
+    Returns (source, URL, title) for every page under content_dir, sorted
+    by source. Titles come from the page index of the last build, so pages
+    added since then have none.
+    """
+    index = load_page_index(dest_dir)
+    pages = []
+    for relative_path in sorted(list_tree(content_dir)):
+        if not relative_path.endswith(".md"):
+            continue
+        entry = index.get(relative_path)
+        title = entry["title"] if entry is not None else None
+        pages.append((os.path.join(content_dir, relative_path), page_url(relative_path), title))
+    return pages
@@ -2,17 +2,58 @@ import re
 
 from textnode import TextNode, TextType
 
+INLINE_PATTERN = re.compile(
+    r"\*\*(?P<bold>.*?)\*\*"
+    r"|_(?P<italic>.*?)_"
+    r"|`(?P<code>.*?)`"
+    r"|!\[(?P<image>[^\[\]]*)\]\((?P<image_url>[^\(\)]*)\)"
+    r"|\[(?P<link>[^\[\]]*)\]\((?P<link_url>[^\(\)]*)\)",
+    re.DOTALL,
+)
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+INLINE_TEXT_TYPES = {
+    "bold": TextType.BOLD,
+    "italic": TextType.ITALIC,
+    "code": TextType.CODE,
+}
+INLINE_DELIMITERS = ("**", "_", "`")
+
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """
+    Tokenizes inline markdown in a single left-to-right scan. Produces the
+    same TextNodes as chaining split_nodes_delimiter for "**", "_" and "`"
+    with split_nodes_image and split_nodes_link, in linear time, except
+    that a link or image found first keeps delimiters in its text or URL
+    literally, where the chain would split it at them.
+    """
+    nodes = []
+    position = 0
+    for match in INLINE_PATTERN.finditer(text):
+        start = match.start()
+        if start > position:
+            nodes.append(_plain_text_node(text[position:start]))
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "image_url":
+            nodes.append(TextNode(match.group("image"), TextType.IMAGE, match.group("image_url")))
+        elif kind == "link_url":
+            nodes.append(TextNode(match.group("link"), TextType.LINK, match.group("link_url")))
+        elif match.group(kind) != "":
+            nodes.append(TextNode(match.group(kind), INLINE_TEXT_TYPES[kind]))
+    if position < len(text):
+        nodes.append(_plain_text_node(text[position:]))
     return nodes
 
 
+def _plain_text_node(text):
+    for delimiter in INLINE_DELIMITERS:
+        if delimiter in text:
+            raise ValueError("invalid markdown, formatted section not closed")
+    return TextNode(text, TextType.TEXT)
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
@@ -35,67 +76,39 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(
-                TextNode(
-                    image[0],
-                    TextType.IMAGE,
-                    image[1],
-                )
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    return new_nodes
+    return _split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
 
 def split_nodes_link(old_nodes):
+    return _split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+
+def _split_nodes_pattern(old_nodes, pattern, text_type):
+    # Slice each text node at the match offsets instead of re-searching it
+    # for every matched literal
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        text = old_node.text
+        position = 0
+        for match in pattern.finditer(text):
+            start = match.start()
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
+        if position == 0:
             new_nodes.append(old_node)
-            continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     return new_nodes
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
-
+    return LINK_PATTERN.findall(text)
@@ -0,0 +1,136 @@
+import os
+import posixpath
+
+
+def page_links(node, markdown="", first_line=1):
+    """
+    Walks a rendered page tree in document order. Returns (links, anchors):
+    [url, line] for every internal href/src, as written in the content, and
+    the sorted id values in the tree. Lines are found by looking for each
+    link's "](url" in markdown, which starts at first_line of the source
+    file; a link that cannot be found gets None.
+    """
+    links = []
+    anchors = set()
+    position = 0
+    line = first_line
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.props:
+            if "id" in node.props:
+                anchors.add(node.props["id"])
+            for prop in ("href", "src"):
+                url = node.props.get(prop)
+                if url is None or link_target(url, "/") is None:
+                    continue
+                found = markdown.find(f"]({url}", position)
+                if found == -1:
+                    links.append([url, None])
+                    continue
+                line += markdown.count("\n", position, found)
+                position = found
+                links.append([url, line])
+        if node.children:
+            stack.extend(reversed(node.children))
+    return links, sorted(anchors)
+
+
+def link_target(url, page_path):
+    """
+    Resolves an internal link against page_path, the URL path of the page
+    it is on. Returns (URL path, fragment), or None for links to other
+    hosts or schemes.
+    """
+    # Imported here so a no-op build, which parses no links, skips it
+    from urllib.parse import unquote, urlsplit
+
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    path = unquote(parts.path)
+    if not path:
+        return page_path, parts.fragment
+    if not path.startswith("/"):
+        path = page_path[: page_path.rfind("/") + 1] + path
+    resolved = posixpath.normpath(path)
+    if path.endswith("/") and resolved != "/":
+        resolved += "/"
+    return resolved, parts.fragment
+
+
+def output_paths(index, static_files=(), extra=()):
+    """
+    Returns the hash set of URL paths a build serves: every page in the
+    page index, under both "/dir/" and "/dir/index.html" for index pages,
+    every static file, relative to the output directory, and the URL paths
+    in extra.
+    """
+    paths = set(extra)
+    for entry in index.values():
+        paths.update(page_outputs(entry["path"]))
+    paths.update("/" + path.replace(os.sep, "/") for path in static_files)
+    return paths
+
+
+def page_outputs(path):
+    # The URL paths a page is served at
+    return (path, path + "index.html") if path.endswith("/") else (path,)
+
+
+def served_path(path, outputs):
+    """
+    Returns the path in outputs a request for path ends up at, allowing for
+    the ways static hosts commonly fill in a missing trailing slash or
+    ".html", or None.
+    """
+    candidates = (path,) if path.endswith("/") else (path, path + "/", path + ".html")
+    for candidate in candidates:
+        if candidate in outputs:
+            return candidate
+    return None
+
+
+def check_links(pages, index, outputs):
+    """
+    Checks the links of the pages named in pages, relative paths into the
+    page index, against the outputs set and the anchors each page records.
+    Returns {relative_path: [[line, url, reason], ...]} for every checked
+    page, with an empty list for pages whose links are all fine.
+    """
+    anchors = {}
+    for entry in index.values():
+        for path in page_outputs(entry["path"]):
+            anchors[path] = entry["anchors"]
+    broken = {}
+    for relative_path in pages:
+        entry = index[relative_path]
+        problems = []
+        for url, line in entry["links"]:
+            path, fragment = link_target(url, entry["path"])
+            target = served_path(path, outputs)
+            if target is None:
+                problems.append([line, url, "no such page or file"])
+            elif fragment and target in anchors and fragment not in anchors[target]:
+                problems.append([line, url, f"no element with id '{fragment}'"])
+        broken[relative_path] = problems
+    return broken
+
+
+def linked_paths(entry):
+    """
+    Returns the sorted URL paths a page's links resolve to. Builds keep
+    them in the page index, so finding the pages that link to a changed
+    output needs no URL parsing.
+    """
+    return sorted({link_target(url, entry["path"])[0] for url, line in entry["links"]})
+
+
+def link_paths(path):
+    # The link paths served_path resolves to the output path
+    paths = {path}
+    if path.endswith("/") and path != "/":
+        paths.add(path[:-1])
+    elif path.endswith(".html"):
+        paths.add(path[: -len(".html")])
+    return paths
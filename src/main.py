@@ -1,33 +1,269 @@
-
+import argparse
 import os
 import shutil
 import sys
 
-from markdown_parser import generate_pages_recursive
-
 # Use 'docs' instead of 'public'
 OUTPUT_DIR = "docs"
 STATIC_DIR = "static"
 CONTENT_DIR = "content"
 TEMPLATE_FILE = "template.html"
+CACHE_DIR = ".cache"
+CACHE_FILE = os.path.join(CACHE_DIR, "trees.sqlite")
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+COMMANDS = ("build", "check", "list", "clean")
 
 def delete_output_dir():
     if os.path.exists(OUTPUT_DIR):
         shutil.rmtree(OUTPUT_DIR)
         print(f"Deleted '{OUTPUT_DIR}' directory.")
 
-def copy_static_to_output():
-    shutil.copytree(STATIC_DIR, OUTPUT_DIR)
-    print(f"Copied static files from '{STATIC_DIR}' to '{OUTPUT_DIR}'.")
+def watched_paths():
+    from incremental import load_manifest
+
+    # Partials and front matter templates resolve next to TEMPLATE_FILE; the
+    # last build's manifest records every one its pages used
+    templates = load_manifest(OUTPUT_DIR)["templates"]
+    return list(dict.fromkeys([CONTENT_DIR, STATIC_DIR, TEMPLATE_FILE, *templates]))
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    # "main.py /static_site/" and "main.py --watch" predate the subcommands
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["build", *argv]
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    build_parser = commands.add_parser(
+        "build", help="build the site (the default when no command is given)"
+    )
+    build_parser.add_argument(
+        "base_path", nargs="?", default="/", help="base path the site is served from"
+    )
+    build_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"only rebuild what changed since the last build instead of wiping '{OUTPUT_DIR}'",
+    )
+    build_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (default: 1)",
+    )
+    build_parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap source reads, rendering on the --jobs workers and output writes "
+        "(helps on slow or network storage)",
+    )
+    build_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"parse every page and render every image variant from scratch instead of using '{CACHE_FILE}' "
+        f"and '{IMAGE_CACHE_DIR}'",
+    )
+    build_parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare sources and static files by content, not just size and mtime",
+    )
+    build_parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="profile.json",
+        metavar="REPORT",
+        help="time every build phase per page and write a JSON report (default: profile.json); implies --jobs 1 "
+        f"and parsing every page without '{CACHE_FILE}'",
+    )
+    build_parser.add_argument(
+        "--profile-top", type=int, default=10, metavar="N", help="slowest pages listed by --profile"
+    )
+    build_parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="also dump cProfile stats to PATH (pstats format, readable by snakeviz or flameprof)",
+    )
+    build_parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="absolute URL of the site's host, e.g. https://example.com; enables sitemap.xml and atom.xml",
+    )
+    build_parser.add_argument(
+        "--minify", action="store_true", help="collapse insignificant whitespace in generated pages"
+    )
+    build_parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed .gz (and .br, if brotli is installed) files next to text outputs",
+    )
+    build_parser.add_argument(
+        "--explain",
+        metavar="PATH",
+        help="show what a page was built from, or which pages use a template or asset, then exit",
+    )
+    build_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=f"serve '{OUTPUT_DIR}' with live reload and rebuild whenever the sources change",
+    )
+    build_parser.add_argument("--port", type=int, default=8888, help="port for --watch (default: 8888)")
+
+    check_parser = commands.add_parser(
+        "check",
+        help="list what a build would regenerate, copy or remove without building; "
+        "exits with status 1 when the site is out of date",
+    )
+    check_parser.add_argument(
+        "base_path", nargs="?", default="/", help="base path the site is served from"
+    )
+    check_parser.add_argument(
+        "--minify", action="store_true", help="check against a build with --minify"
+    )
+    check_parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare sources and static files by content, not just size and mtime",
+    )
+    commands.add_parser("list", help="print the URL, source and title of every page")
+    clean_parser = commands.add_parser("clean", help=f"delete the '{OUTPUT_DIR}' directory")
+    clean_parser.add_argument(
+        "--cache", action="store_true", help=f"also delete the page tree and image caches in '{CACHE_DIR}'"
+    )
+    args = parser.parse_args(argv)
+    if args.command == "build" and args.jobs < 1:
+        build_parser.error("--jobs must be at least 1")
+    return args
+
+def build(args):
+    from incremental import build_site
+
+    # A cached tree skips the parse phases --profile is meant to break down
+    cache_path = None if args.no_cache or args.profile else CACHE_FILE
+    profiler = None
+    if args.profile:
+        from profiler import BuildProfiler
+
+        profiler = BuildProfiler()
+    if args.cprofile:
+        import cProfile
+
+        stats = cProfile.Profile()
+        stats.enable()
+    result = build_site(
+        CONTENT_DIR,
+        STATIC_DIR,
+        TEMPLATE_FILE,
+        OUTPUT_DIR,
+        args.base_path,
+        args.jobs,
+        cache_path,
+        checksum=args.checksum,
+        profiler=profiler,
+        site_url=args.site_url,
+        minify=args.minify,
+        compress=args.compress,
+        image_cache_dir=None if args.no_cache else IMAGE_CACHE_DIR,
+        pipeline=args.pipeline,
+    )
+    if args.cprofile:
+        stats.disable()
+        stats.dump_stats(args.cprofile)
+        print(f"Wrote cProfile stats to '{args.cprofile}'.")
+    print(
+        f"Generated {len(result['generated'])} pages ({result['written']} written, "
+        f"{result['skipped']} unchanged), copied {len(result['copied'])} static files, "
+        f"removed {len(result['removed'])} stale outputs."
+    )
+    if args.compress:
+        print(f"Precompressed {result['compressed']} files.")
+    if cache_path is not None:
+        print(f"Parse cache: {result['cache_hits']} hits, {result['cache_misses']} misses.")
+    if profiler is not None:
+        profiler.print_summary(args.profile_top)
+        profiler.save(args.profile)
+        print(f"Wrote profile report to '{args.profile}'.")
+    for from_path, error in result["errors"]:
+        print(f"  {from_path}: {error}", file=sys.stderr)
+    if result["broken_links"]:
+        print(f"Found {len(result['broken_links'])} broken links:", file=sys.stderr)
+    for source, line, url, reason in result["broken_links"]:
+        location = source if line is None else f"{source}:{line}"
+        print(f"  {location}: broken link {url} ({reason})", file=sys.stderr)
+    return result
+
 
-def main():
-    # Get base path from CLI args, default to "/"
-    base_path = sys.argv[1] if len(sys.argv) > 1 else "/"
+def check(args):
+    from incremental import check_site
 
+    result = check_site(
+        CONTENT_DIR,
+        STATIC_DIR,
+        TEMPLATE_FILE,
+        OUTPUT_DIR,
+        args.base_path,
+        minify=args.minify,
+        checksum=args.checksum,
+    )
+    sections = (
+        ("pages to generate", CONTENT_DIR, result["pages"]),
+        ("pages to remove", CONTENT_DIR, result["deleted"]),
+        ("static files to copy", STATIC_DIR, result["copied"]),
+        ("static files to remove", STATIC_DIR, result["removed"]),
+    )
+    for label, directory, paths in sections:
+        if paths:
+            print(f"{len(paths)} {label}:")
+            for path in paths:
+                print(f"  {os.path.join(directory, path)}")
+    if not any(paths for label, directory, paths in sections):
+        print(f"'{OUTPUT_DIR}' is up to date.")
+        return True
+    return False
+
+def clean(args):
     delete_output_dir()
-    copy_static_to_output()
-    generate_pages_recursive(CONTENT_DIR, TEMPLATE_FILE, OUTPUT_DIR, base_path)
+    if args.cache and os.path.exists(CACHE_DIR):
+        shutil.rmtree(CACHE_DIR)
+        print(f"Deleted '{CACHE_DIR}' directory.")
+
+def main(argv=None):
+    # Commands import what they use, so the quick ones start fast
+    args = parse_args(argv)
+
+    if args.command == "check":
+        if not check(args):
+            sys.exit(1)
+        return
+    if args.command == "list":
+        from incremental import list_pages
+
+        for source, url, title in list_pages(CONTENT_DIR, OUTPUT_DIR):
+            print(f"{url}\t{source}\t{title or ''}")
+        return
+    if args.command == "clean":
+        clean(args)
+        return
+
+    if args.explain:
+        from incremental import explain
+
+        # Reads the graph the last build left in the manifest; builds nothing
+        print("\n".join(explain(args.explain, CONTENT_DIR, STATIC_DIR, OUTPUT_DIR)))
+        return
+
+    if not args.incremental:
+        delete_output_dir()
+    result = build(args)
+
+    if args.watch:
+        from dev_server import run
+
+        # Later builds only touch what changed, tracked by the build manifest
+        run(OUTPUT_DIR, watched_paths, lambda changed: build(args), port=args.port)
+    elif result["errors"]:
+        sys.exit(f"{len(result['errors'])} pages failed to generate.")
 
 if __name__ == "__main__":
     main()
-
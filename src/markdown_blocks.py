@@ -5,6 +5,10 @@ from inline_markdown import text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
 
 
+# Bump whenever rendered output changes, so cached page trees are not reused
+PARSER_VERSION = 1
+
+
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
     HEADING = "heading"
@@ -15,34 +19,75 @@ class BlockType(Enum):
 
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+    return ["\n".join(lines) for lines in iter_block_lines(markdown)]
+
+
+def iter_lines(markdown):
+    # Accept a whole document or any iterable of lines, such as a file object
+    if isinstance(markdown, str):
+        return markdown.split("\n")
+    return (line.rstrip("\n") for line in markdown)
+
+
+def iter_block_lines(markdown):
+    """
+    Scans markdown line by line and yields each block as a list of lines.
+    Blocks are separated by empty lines, and each block is stripped of
+    surrounding whitespace, as splitting the text on "\n\n" and stripping
+    every piece would. Whitespace-only blocks are skipped.
+    """
+    lines = []
+    for line in iter_lines(markdown):
+        if line != "":
+            lines.append(line)
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        if lines:
+            block = _strip_block(lines)
+            if block:
+                yield block
+            lines = []
+    if lines:
+        block = _strip_block(lines)
+        if block:
+            yield block
+
+
+def _strip_block(lines):
+    start = 0
+    end = len(lines)
+    while start < end and lines[start].strip() == "":
+        start += 1
+    while end > start and lines[end - 1].strip() == "":
+        end -= 1
+    if start == end:
+        return []
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return lines
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return lines_to_block_type(block.split("\n"))
+
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+def lines_to_block_type(lines):
+    first = lines[0]
+    if first.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
         return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if len(lines) > 1 and first.startswith("```") and lines[-1].startswith("```"):
         return BlockType.CODE
-    if block.startswith(">"):
+    if first.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    if block.startswith("- "):
+    if first.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return BlockType.PARAGRAPH
         return BlockType.ULIST
-    if block.startswith("1. "):
+    if first.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
@@ -53,28 +98,41 @@ def block_to_block_type(block):
 
 
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
-    return ParentNode("div", children, None)
+    """
+    Renders markdown, given as a string or an iterable of lines, into a div
+    of block nodes. Each block is classified and rendered from its lines as
+    soon as the scanner yields it.
+    """
+    return ParentNode("div", list(iter_block_nodes(markdown)), None)
+
+
+def iter_block_nodes(markdown):
+    """
+    Yields the rendered node of each block in turn, so a caller can write
+    out a document while holding only one block in memory.
+    """
+    for lines in iter_block_lines(markdown):
+        yield lines_to_html_node(lines)
 
 
 def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+    return lines_to_html_node(block.split("\n"))
+
+
+def lines_to_html_node(lines):
+    block_type = lines_to_block_type(lines)
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return _lines_to_paragraph(lines)
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return _lines_to_heading(lines)
     if block_type == BlockType.CODE:
-        return code_to_html_node(block)
+        return _lines_to_code(lines)
     if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
+        return _lines_to_olist(lines)
     if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
+        return _lines_to_ulist(lines)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return _lines_to_quote(lines)
     raise ValueError("invalid block type")
 
 
@@ -88,13 +146,21 @@ def text_to_children(text):
 
 
 def paragraph_to_html_node(block):
-    lines = block.split("\n")
+    return _lines_to_paragraph(block.split("\n"))
+
+
+def _lines_to_paragraph(lines):
     paragraph = " ".join(lines)
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
 def heading_to_html_node(block):
+    return _lines_to_heading(block.split("\n"))
+
+
+def _lines_to_heading(lines):
+    block = "\n".join(lines)
     level = 0
     for char in block:
         if char == "#":
@@ -109,6 +175,11 @@ def heading_to_html_node(block):
 
 
 def code_to_html_node(block):
+    return _lines_to_code(block.split("\n"))
+
+
+def _lines_to_code(lines):
+    block = "\n".join(lines)
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
@@ -119,9 +190,12 @@ def code_to_html_node(block):
 
 
 def olist_to_html_node(block):
-    items = block.split("\n")
+    return _lines_to_olist(block.split("\n"))
+
+
+def _lines_to_olist(lines):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[3:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
@@ -129,9 +203,12 @@ def olist_to_html_node(block):
 
 
 def ulist_to_html_node(block):
-    items = block.split("\n")
+    return _lines_to_ulist(block.split("\n"))
+
+
+def _lines_to_ulist(lines):
     html_items = []
-    for item in items:
+    for item in lines:
         text = item[2:]
         children = text_to_children(text)
         html_items.append(ParentNode("li", children))
@@ -139,7 +216,10 @@ def ulist_to_html_node(block):
 
 
 def quote_to_html_node(block):
-    lines = block.split("\n")
+    return _lines_to_quote(block.split("\n"))
+
+
+def _lines_to_quote(lines):
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
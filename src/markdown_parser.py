@@ -1,44 +1,279 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 
-from file_utils import read_file, write_file
-from markdown_blocks import markdown_to_html_node
+from tree_cache import open_cache
+import markdown_blocks
+from file_utils import OutputWriter, iter_mapped_lines, read_file
+from front_matter import read_front_matter, split_front_matter
+from images import annotate_images
+from link_checker import page_links
+from markdown_blocks import PARSER_VERSION, iter_block_nodes, markdown_to_html_node
+from page_index import page_entry, template_values
+from postprocess import minify_chunks, minify_html
+from profiler import profile_phase
+from site_files import TextStats
+from template import TemplateLoader
 
+# Sources at least this big are memory-mapped and streamed block by block
+LARGE_FILE_THRESHOLD = 16 * 1024 * 1024
 
-def generate_page(from_path, template_path, dest_path, base_path="/"):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+# markdown_blocks functions timed by --profile, and the phase each reports as
+PROFILED_FUNCTIONS = {
+    "iter_block_lines": "markdown_to_blocks",
+    "lines_to_block_type": "block_to_block_type",
+    "text_to_children": "inline",
+}
 
-    # Read files
-    markdown = read_file(from_path)
-    template = read_file(template_path)
 
-    # Generate HTML content and title
-    html_node = markdown_to_html_node(markdown)
-    html_content = html_node.to_html()
-    title = extract_title(markdown)
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    base_path="/",
+    template=None,
+    cache=None,
+    profiler=None,
+    writer=None,
+    loader=None,
+    minify=False,
+    images=None,
+    listing=None,
+):
+    # Compile the template unless the caller already did for the whole build
+    if loader is None:
+        loader = TemplateLoader(base_path)
+    if template is None:
+        template = loader.load(template_path)
+    default_template = template
+    if writer is None:
+        writer = OutputWriter()
+    if profiler is not None:
+        profiler.page = from_path
+    try:
+        if os.path.getsize(from_path) >= LARGE_FILE_THRESHOLD:
+            with profile_phase(profiler, "stream_large_page"):
+                return generate_large_page(
+                    from_path,
+                    dest_path,
+                    base_path,
+                    template,
+                    writer,
+                    lambda meta: page_template(meta, default_template, template_path, loader),
+                    minify,
+                    images,
+                    listing,
+                )
 
-    # Fill template
-    result = template.replace("{{ Title }}", title)
-    result = result.replace("{{ Content }}", html_content)
-    result = result.replace("{{ BasePath }}", base_path.rstrip("/"))
+        # Read file
+        with profile_phase(profiler, "read"):
+            source = read_file(from_path)
 
-    # Normalize and patch asset links to respect base_path
-    result = result.replace('href="/', f'href="{base_path.rstrip("/")}/')
-    result = result.replace('src="/', f'src="{base_path.rstrip("/")}/')
+        if profiler is None:
+            # Stream the filled template into the writer, which leaves the
+            # output untouched if its bytes did not change
+            chunks, entry = render_page(
+                source, default_template, template_path, base_path, cache, loader, minify, images, listing
+            )
+            writer.write_chunks(dest_path, chunks)
+            return entry
 
-    # Ensure destination directory exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        template, html_node, values, entry = parse_page(
+            source, default_template, template_path, base_path, cache, loader, images, listing
+        )
+        # When profiling, serialize, fill and write as separate steps so each can be timed
+        with profiler.phase("to_html"):
+            values["Content"] = html_node.to_html()
+        with profiler.phase("template"):
+            result = template.render(**values)
+        if minify:
+            with profiler.phase("minify"):
+                result = minify_html(result)
+        with profiler.phase("write"):
+            writer.write(dest_path, result)
+        return entry
+    finally:
+        # Later build-wide phases must not be charged to this page
+        if profiler is not None:
+            profiler.page = None
 
-    # Write output
-    write_file(dest_path, result)
 
+def render_page(
+    source,
+    template,
+    template_path,
+    base_path="/",
+    cache=None,
+    loader=None,
+    minify=False,
+    images=None,
+    listing=None,
+):
+    """
+    Parses a page's source with parse_page and fills its template. Returns
+    (iterator of output HTML chunks, page index entry).
+    """
+    template, html_node, values, entry = parse_page(
+        source, template, template_path, base_path, cache, loader, images, listing
+    )
+    values["Content"] = html_node.iter_html()
+    chunks = template.iter_render(**values)
+    return (minify_chunks(chunks) if minify else chunks), entry
+
+
+def parse_page(
+    source, template, template_path, base_path="/", cache=None, loader=None, images=None, listing=None
+):
+    """
+    Parses a page's markdown source, front matter included, and picks its
+    template, template being the default. Returns (template, content
+    HTMLNode, template values without Content, page index entry). The
+    entry also lists the page's internal links, with their source lines,
+    and its anchor ids for the link checker. listing, the site's page list
+    from page_index.render_page_list, fills {{ Pages }}.
+    """
+    if loader is None:
+        loader = TemplateLoader(base_path)
+    meta, markdown = split_front_matter(source)
+    template = page_template(meta, template, template_path, loader)
+    first_line = source.count("\n", 0, len(source) - len(markdown)) + 1
+
+    # Generate HTML content and title, pointing root-relative links at base_path
+    if cache is not None:
+        # A cached tree is a fresh copy, so the transforms below may edit it
+        html_node = cache.tree(markdown, markdown_to_html_node)
+    else:
+        html_node = markdown_to_html_node(markdown)
+    # Links are collected as written, before base_path is prefixed
+    content_links, anchors = page_links(html_node, markdown, first_line)
+    if images is not None:
+        annotate_images(html_node, images, base_path)
+    links = prefix_root_links(html_node, base_path)
+    title = meta.get("title") or extract_title(markdown)
+    stats = TextStats().add(html_node.iter_text())
+    entry = page_entry(meta, title, stats.word_count, stats.terms, stats.summary())
+    entry["dependencies"] = page_dependencies(template, links)
+    entry["links"] = content_links
+    entry["anchors"] = sorted(set(anchors) | set(template.anchors))
+    return template, html_node, page_values(entry, listing), entry
+
+
+def generate_large_page(
+    from_path,
+    dest_path,
+    base_path,
+    template,
+    writer=None,
+    select_template=None,
+    minify=False,
+    images=None,
+    listing=None,
+):
+    """
+    Renders a very large source without loading it whole: the file is
+    memory-mapped, parsed one block at a time and each block's HTML is
+    written out before the next is parsed, so peak memory follows the
+    largest block rather than the document. The text statistics are only
+    known once the content has streamed out, so the template gets no word
+    count. select_template, if given, maps the page's front matter to the
+    template to use instead of template. minify collapses whitespace in
+    the output as it streams, images, the image index, sizes <img>s and
+    listing fills {{ Pages }}.
+    """
+    meta, lines = read_front_matter(iter_mapped_lines(from_path))
+    title = meta.get("title") or extract_title(lines)
+    if select_template is not None:
+        template = select_template(meta)
+    stats = TextStats()
+    links = []
+    content_links = []
+    anchors = set(template.anchors)
+
+    def content():
+        yield "<div>"
+        _, lines = read_front_matter(iter_mapped_lines(from_path))
+        for node in iter_block_nodes(lines):
+            # No source text is kept to find link lines in
+            block_links, block_anchors = page_links(node)
+            content_links.extend(block_links)
+            anchors.update(block_anchors)
+            if images is not None:
+                annotate_images(node, images, base_path)
+            links.extend(prefix_root_links(node, base_path))
+            stats.add(node.iter_text())
+            yield from node.iter_html()
+        yield "</div>"
+
+    if writer is None:
+        writer = OutputWriter()
+    values = page_values(page_entry(meta, title, 0), listing)
+    del values["WordCount"]
+    values["Content"] = content()
+    chunks = template.iter_render(**values)
+    writer.write_chunks(dest_path, minify_chunks(chunks) if minify else chunks)
+    entry = page_entry(meta, title, stats.word_count, stats.terms, stats.summary())
+    entry["dependencies"] = page_dependencies(template, links)
+    entry["links"] = content_links
+    entry["anchors"] = sorted(anchors)
+    return entry
+
+
+def page_template(meta, default_template, template_path, loader):
+    """
+    Returns the template a page asked for with a "template" front matter
+    key, resolved relative to the default template's directory, or the
+    default template.
+    """
+    name = meta.get("template")
+    if not name:
+        return default_template
+    return loader.load(os.path.join(os.path.dirname(template_path), name))
 
 
-def extract_title(markdown: str) -> str:
+def page_dependencies(template, links):
+    return {
+        "templates": list(template.dependencies),
+        "links": sorted(set(links) | set(template.links)),
+        # Pages listing the whole site must follow changes to the index
+        "listing": "Pages" in template.names,
+    }
+
+
+def page_values(entry, listing=None):
+    values = template_values(entry)
+    values["Pages"] = listing or ""
+    return values
+
+
+def prefix_root_links(node, base_path):
+    """
+    Prefixes root-relative href/src props in the tree with base_path, so
+    content links keep working when the site is served from a subdirectory.
+    Returns the root-relative URLs found, as written in the content.
+    """
+    prefix = base_path.rstrip("/")
+    links = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.props:
+            for prop in ("href", "src"):
+                url = node.props.get(prop)
+                if url and url.startswith("/") and not url.startswith("//"):
+                    links.append(url)
+                    node.props[prop] = prefix + url
+        if node.children:
+            stack.extend(node.children)
+    return links
+
+
+
+def extract_title(markdown) -> str:
     """
-    Extracts the first h1 title (line starting with "# ") from the given markdown string.
-    Raises a ValueError if no h1 header is found.
+    Extracts the first h1 title (line starting with "# ") from the given markdown string
+    or iterable of lines. Raises a ValueError if no h1 header is found.
     """
-    for line in markdown.splitlines():
+    lines = markdown.splitlines() if isinstance(markdown, str) else markdown
+    for line in lines:
         line = line.strip()
         if line.startswith("# "):  # Ensure it's a single '#' and a space
             return line[2:].strip()
@@ -46,7 +281,10 @@ def extract_title(markdown: str) -> str:
 
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path="/"):
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, base_path="/", jobs=1, cache_path=None
+):
+    pages = []
     for root, dirs, files in os.walk(dir_path_content):
         for file in files:
             if not file.endswith(".md"):
@@ -57,5 +295,130 @@ def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, bas
             dest_path = os.path.splitext(relative_path)[0] + ".html"
             dest_path = os.path.join(dest_dir_path, dest_path)
 
-            generate_page(from_path, template_path, dest_path, base_path)
+            pages.append((from_path, dest_path))
+    return generate_pages(sorted(pages), template_path, base_path, jobs, cache_path)
+
+
+def generate_pages(
+    pages,
+    template_path,
+    base_path="/",
+    jobs=1,
+    cache_path=None,
+    profiler=None,
+    minify=False,
+    images=None,
+    pipeline=False,
+    listings=None,
+):
+    """
+    Generates every (from_path, dest_path) pair in pages, spreading the work
+    over a pool of jobs processes when jobs > 1. Pages are reported in input
+    order either way, and a failing page does not stop the others. Returns a
+    dict with an "errors" list of (from_path, error message) pairs, the page
+    index entry of every generated page under "pages", how many
+    outputs were written or skipped as unchanged, and the page tree cache
+    hit/miss counts when cache_path names a TreeCache store.
+    A profiler records per-phase timings and forces a serial build.
+    minify collapses insignificant whitespace in every page and images, an
+    image index from images.process_images, adds sizes to their <img>s.
+    pipeline overlaps reads, rendering and writes (see pipeline.run_pipeline).
+    listings maps the from_path of pages to the page list their template gets
+    as {{ Pages }}; other pages get an empty one.
+    """
+    loader = TemplateLoader(base_path)
+    template = loader.load(template_path)
+    work = [
+        (
+            from_path,
+            template_path,
+            dest_path,
+            base_path,
+            template,
+            cache_path,
+            profiler,
+            loader,
+            minify,
+            images,
+            (listings or {}).get(from_path),
+        )
+        for from_path, dest_path in pages
+    ]
+    if profiler is not None:
+        with profiler.instrument(markdown_blocks, PROFILED_FUNCTIONS):
+            result = _report_pages(work, map(_generate_page_job, work))
+    elif pipeline:
+        from pipeline import run_pipeline
+
+        result = _report_pages(work, run_pipeline(work, jobs))
+    elif jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(work) // (jobs * 4))
+            outcomes = executor.map(_generate_page_job, work, chunksize=chunksize)
+            result = _report_pages(work, outcomes)
+    else:
+        result = _report_pages(work, map(_generate_page_job, work))
+    if cache_path is not None:
+        open_cache(cache_path, PARSER_VERSION).evict()
+    return result
+
+
+def _generate_page_job(args):
+    (
+        from_path,
+        template_path,
+        dest_path,
+        base_path,
+        template,
+        cache_path,
+        profiler,
+        loader,
+        minify,
+        images,
+        listing,
+    ) = args
+    cache = open_cache(cache_path, PARSER_VERSION) if cache_path is not None else None
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    writer = OutputWriter()
+    outcome = {"error": None, "page": None}
+    try:
+        outcome["page"] = generate_page(
+            from_path,
+            template_path,
+            dest_path,
+            base_path,
+            template,
+            cache,
+            profiler,
+            writer,
+            loader,
+            minify,
+            images,
+            listing,
+        )
+    except Exception as e:
+        outcome["error"] = f"{type(e).__name__}: {e}"
+    outcome["written"] = writer.written
+    outcome["skipped"] = writer.skipped
+    outcome["cache_hits"] = 0
+    outcome["cache_misses"] = 0
+    if cache is not None:
+        cache.commit()
+        outcome["cache_hits"] = cache.hits - hits
+        outcome["cache_misses"] = cache.misses - misses
+    return outcome
+
 
+def _report_pages(work, outcomes):
+    result = {"errors": [], "pages": {}, "written": 0, "skipped": 0, "cache_hits": 0, "cache_misses": 0}
+    for (from_path, template_path, dest_path, *_), outcome in zip(work, outcomes):
+        for key in ("written", "skipped", "cache_hits", "cache_misses"):
+            result[key] += outcome[key]
+        if outcome["error"] is not None:
+            print(f"Failed to generate page from {from_path}: {outcome['error']}")
+            result["errors"].append((from_path, outcome["error"]))
+            continue
+        used_template = outcome["page"]["dependencies"]["templates"][0]
+        print(f"Generated page from {from_path} to {dest_path} using {used_template}")
+        result["pages"][from_path] = outcome["page"]
+    return result
@@ -0,0 +1,106 @@
+import json
+import os
+
+PAGE_INDEX_FILE = ".page_index.json"
+PAGE_INDEX_VERSION = 3
+
+# Front matter keys with a dedicated field in every index entry
+PAGE_FIELDS = ("title", "date", "tags")
+
+
+def page_entry(meta, title, word_count, terms=(), summary=""):
+    """
+    Builds the index entry for a rendered page from its front matter, title
+    and plain text statistics. Front matter keys without a dedicated field
+    are kept under "meta".
+    """
+    tags = meta.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    return {
+        "title": title,
+        "date": meta.get("date"),
+        "tags": tags,
+        "word_count": word_count,
+        "terms": sorted(terms),
+        "summary": summary,
+        "meta": {key: value for key, value in meta.items() if key not in PAGE_FIELDS},
+    }
+
+
+def page_url(relative_path):
+    """
+    Returns the site URL path of a content file: "blog/tom/index.md" is
+    served as "/blog/tom/" and "about.md" as "/about.html".
+    """
+    stem = os.path.splitext(relative_path)[0].replace(os.sep, "/")
+    if stem == "index":
+        return "/"
+    if stem.endswith("/index"):
+        return "/" + stem[: -len("index")]
+    return f"/{stem}.html"
+
+
+def template_values(entry):
+    """
+    Returns the template placeholders for a page: Title, Date, Tags,
+    WordCount and one capitalized placeholder per extra front matter
+    key, so "author: ..." fills {{ Author }}. Values are HTML-escaped.
+    """
+    # Imported here so reading the index does not load the HTML stack
+    from htmlnode import escape_html
+
+    values = {}
+    for key, value in entry["meta"].items():
+        value = ", ".join(value) if isinstance(value, list) else value
+        values[key[:1].upper() + key[1:]] = escape_html(value)
+    values.update(
+        {
+            "Title": escape_html(entry["title"]),
+            "Date": escape_html(entry["date"] or ""),
+            "Tags": escape_html(", ".join(entry["tags"])),
+            "WordCount": str(entry["word_count"]),
+        }
+    )
+    return values
+
+
+def render_page_list(index, base_path="/"):
+    """
+    Renders the {{ Pages }} placeholder: a list linking to every page in
+    the index with its date, newest first and undated pages last, in URL
+    order. Titles are HTML-escaped and links prefixed with base_path.
+    """
+    from htmlnode import escape_html
+
+    prefix = base_path.rstrip("/")
+    entries = sorted(index.values(), key=lambda entry: entry["path"])
+    entries.sort(key=lambda entry: entry["date"] or "", reverse=True)
+    items = []
+    for entry in entries:
+        item = f'<li><a href="{escape_html(prefix + entry["path"])}">{escape_html(entry["title"])}</a>'
+        if entry["date"]:
+            date = escape_html(entry["date"])
+            item += f' <time datetime="{date}">{date}</time>'
+        items.append(item + "</li>")
+    return '<ul class="pages">' + "".join(items) + "</ul>"
+
+
+def load_page_index(dest_dir):
+    path = os.path.join(dest_dir, PAGE_INDEX_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != PAGE_INDEX_VERSION:
+        return {}
+    return index["pages"]
+
+
+def save_page_index(dest_dir, pages):
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, PAGE_INDEX_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        # Compact, as the index holds every page's terms and links
+        json.dump({"version": PAGE_INDEX_VERSION, "pages": pages}, f, separators=(",", ":"), sort_keys=True)
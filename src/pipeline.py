@@ -0,0 +1,149 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from tree_cache import open_cache
+from file_utils import OutputWriter, read_file
+from markdown_blocks import PARSER_VERSION
+import markdown_parser
+from markdown_parser import generate_page, render_page
+
+# Sources read ahead of the CPU stage and rendered pages waiting to be
+# written, per worker process; bounds the memory the pipeline holds
+QUEUE_DEPTH = 4
+IO_WORKERS = 8
+
+
+def run_pipeline(work, jobs=1, queue_depth=QUEUE_DEPTH, io_workers=IO_WORKERS):
+    """
+    Generates the pages in work, the job tuples built by generate_pages,
+    as three overlapping stages: source reads on a thread pool, parsing and
+    rendering on a pool of jobs processes, and output writes back on the
+    thread pool. Bounded queues between the stages apply backpressure, so
+    a slow disk stalls the readers instead of piling up pages in memory.
+    Returns the per-page outcomes in work order.
+    """
+    return asyncio.run(_run_pipeline(work, jobs, queue_depth, io_workers))
+
+
+async def _run_pipeline(work, jobs, queue_depth, io_workers):
+    loop = asyncio.get_running_loop()
+    outcomes = [None] * len(work)
+    sources = asyncio.Queue(queue_depth * jobs)
+    rendered = asyncio.Queue(queue_depth * jobs)
+    positions = iter(range(len(work)))
+    renderers = jobs * 2
+    writers = max(1, io_workers // 2)
+
+    async def read():
+        for position in positions:
+            from_path = work[position][0]
+            try:
+                source = await loop.run_in_executor(io_pool, _read_source, from_path)
+            except Exception as e:
+                outcomes[position] = _failed(e)
+                continue
+            await sources.put((position, source))
+
+    async def render():
+        while (item := await sources.get()) is not None:
+            position, source = item
+            job = (work[position], source)
+            outcome = await loop.run_in_executor(cpu_pool, _render_page_job, job)
+            await rendered.put((position, outcome))
+
+    async def write():
+        while (item := await rendered.get()) is not None:
+            position, outcome = item
+            html = outcome.pop("html")
+            if html is not None:
+                dest_path = work[position][2]
+                await loop.run_in_executor(io_pool, _write_output, dest_path, html, outcome)
+            outcomes[position] = outcome
+
+    with ThreadPoolExecutor(io_workers) as io_pool, ProcessPoolExecutor(jobs) as cpu_pool:
+        render_tasks = [asyncio.create_task(render()) for _ in range(renderers)]
+        write_tasks = [asyncio.create_task(write()) for _ in range(writers)]
+        await asyncio.gather(*(read() for _ in range(io_workers // 2 or 1)))
+        for _ in render_tasks:
+            await sources.put(None)
+        await asyncio.gather(*render_tasks)
+        for _ in write_tasks:
+            await rendered.put(None)
+        await asyncio.gather(*write_tasks)
+    return outcomes
+
+
+def _read_source(from_path):
+    # Very large sources are streamed by the worker itself, not read here
+    if os.path.getsize(from_path) >= markdown_parser.LARGE_FILE_THRESHOLD:
+        return None
+    return read_file(from_path)
+
+
+def _render_page_job(args):
+    """
+    Renders one page in a worker process. Returns an outcome dict like
+    generate_pages' with the page HTML under "html" for the writer stage;
+    "html" is None when the page was streamed to its output directly.
+    """
+    job, source = args
+    from_path, template_path, dest_path, base_path, template, cache_path, _, loader, minify, images, listing = job
+    cache = open_cache(cache_path, PARSER_VERSION) if cache_path is not None else None
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    outcome = {"error": None, "page": None, "html": None, "written": 0, "skipped": 0}
+    try:
+        if source is None:
+            writer = OutputWriter()
+            outcome["page"] = generate_page(
+                from_path,
+                template_path,
+                dest_path,
+                base_path,
+                template,
+                cache,
+                None,
+                writer,
+                loader,
+                minify,
+                images,
+                listing,
+            )
+            outcome["written"] = writer.written
+            outcome["skipped"] = writer.skipped
+        else:
+            chunks, outcome["page"] = render_page(
+                source, template, template_path, base_path, cache, loader, minify, images, listing
+            )
+            outcome["html"] = "".join(chunks)
+    except Exception as e:
+        outcome["error"] = f"{type(e).__name__}: {e}"
+    outcome["cache_hits"] = 0
+    outcome["cache_misses"] = 0
+    if cache is not None:
+        cache.commit()
+        outcome["cache_hits"] = cache.hits - hits
+        outcome["cache_misses"] = cache.misses - misses
+    return outcome
+
+
+def _write_output(dest_path, html, outcome):
+    writer = OutputWriter()
+    try:
+        writer.write(dest_path, html)
+    except OSError as e:
+        outcome["error"] = f"{type(e).__name__}: {e}"
+        outcome["page"] = None
+    outcome["written"] += writer.written
+    outcome["skipped"] += writer.skipped
+
+
+def _failed(error):
+    return {
+        "error": f"{type(error).__name__}: {error}",
+        "page": None,
+        "written": 0,
+        "skipped": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+    }
@@ -0,0 +1,155 @@
+import gzip
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from file_utils import SYNC_JOBS, OutputWriter
+
+# Elements whose text is whitespace-sensitive and passed through untouched
+PRESERVE_PATTERN = re.compile(r"<(pre|textarea|script|style)\b[^>]*>", re.IGNORECASE)
+# Whole tags, whose quoted attribute values may hold ">" and keep their
+# whitespace, or whitespace runs between them
+TAG_PATTERN = re.compile(r"""<(?:[^>"']|"[^"]*"|'[^']*')*>""")
+MINIFY_PATTERN = re.compile(TAG_PATTERN.pattern + r"|\s+")
+ATTRIBUTE_PATTERN = re.compile(r"""("[^"]*"|'[^']*')|\s+""")
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".xml")
+
+
+def minify_chunks(chunks):
+    """
+    Collapses every whitespace run in a stream of HTML chunks to a single
+    newline, if it contained one, or a single space, which browsers render
+    identically. <pre>, <textarea>, <script> and <style> contents and quoted
+    attribute values are left alone. A tag or whitespace run split across chunks is held back until
+    it is complete, so chunk boundaries do not change the result.
+    """
+    pending = ""
+    preserve = None
+    for chunk in chunks:
+        text = pending + chunk
+        cut = len(text)
+        start = text.rfind("<")
+        if start != -1 and not TAG_PATTERN.match(text, start):
+            cut = start
+        while cut > 0 and text[cut - 1].isspace():
+            cut -= 1
+        pending = text[cut:]
+        if cut:
+            minified, preserve = _minify(text[:cut], preserve)
+            yield minified
+    if pending:
+        minified, preserve = _minify(pending, preserve)
+        yield minified
+
+
+def minify_html(html):
+    return "".join(minify_chunks([html]))
+
+
+def _minify(text, preserve):
+    # preserve is the name of the element whose closing tag we are inside of
+    pieces = []
+    position = 0
+    lowered = None
+    while position < len(text):
+        if preserve is not None:
+            if lowered is None:
+                lowered = text.lower()
+            end = lowered.find(f"</{preserve}", position)
+            if end == -1:
+                pieces.append(text[position:])
+                return "".join(pieces), preserve
+            pieces.append(text[position:end])
+            position = end
+            preserve = None
+            continue
+        match = PRESERVE_PATTERN.search(text, position)
+        end = match.end() if match else len(text)
+        pieces.append(MINIFY_PATTERN.sub(_collapse, text[position:end]))
+        position = end
+        if match:
+            preserve = match.group(1).lower()
+    return "".join(pieces), preserve
+
+
+def _collapse(match):
+    text = match.group()
+    if text.startswith("<"):
+        return ATTRIBUTE_PATTERN.sub(_collapse, text)
+    if match.lastindex:
+        # A quoted attribute value
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def compressed_siblings():
+    """
+    Returns (suffix, compress) pairs for the encodings available here:
+    gzip always, brotli when the brotli package is installed.
+    """
+    encodings = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        encodings.append((".br", lambda data: brotli.compress(data, quality=11)))
+    return encodings
+
+
+def precompress_file(path, writer=None):
+    """
+    Writes a compressed sibling of path for every available encoding,
+    skipping those already newer than path. Returns the number written.
+    """
+    if writer is None:
+        writer = OutputWriter()
+    mtime = os.stat(path).st_mtime_ns
+    data = None
+    written = 0
+    for suffix, compress in compressed_siblings():
+        target = path + suffix
+        try:
+            if os.stat(target).st_mtime_ns >= mtime:
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        writer.write_bytes(target, compress(data))
+        # An identical sibling is left in place by the writer; touch it so
+        # it still reads as up to date against the rewritten source
+        os.utime(target)
+        written += 1
+    return written
+
+
+def precompress_tree(dest_dir, jobs=SYNC_JOBS):
+    """
+    Precompresses every HTML, CSS, JS, JSON and XML file under dest_dir on a
+    thread pool (zlib and brotli release the GIL while compressing) and
+    removes compressed siblings whose source is gone. Returns
+    {"compressed": files written, "removed": stale siblings removed}.
+    """
+    sources = []
+    removed = 0
+    for root, dirs, files in os.walk(dest_dir):
+        names = set(files)
+        for name in files:
+            path = os.path.join(root, name)
+            if name.startswith("."):
+                # Build metadata such as the manifest is never served
+                continue
+            source = os.path.splitext(name)[0]
+            if name.endswith((".gz", ".br")) and source.endswith(COMPRESSIBLE_EXTENSIONS):
+                if source not in names:
+                    os.remove(path)
+                    removed += 1
+            elif name.endswith(COMPRESSIBLE_EXTENSIONS):
+                sources.append(path)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        compressed = sum(executor.map(precompress_file, sources))
+    return {"compressed": compressed, "removed": removed}
@@ -0,0 +1,109 @@
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class BuildProfiler:
+    """
+    Records wall time and the net change in allocated memory blocks per
+    build phase, both for the whole build and for the page currently being
+    generated. Blocks freed within a phase cancel out, so the change is not
+    an allocation count and can be negative.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.pages = {}
+        self.page = None
+
+    @contextmanager
+    def phase(self, name):
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, sys.getallocatedblocks() - blocks)
+
+    def record(self, name, seconds, blocks):
+        targets = [self.totals]
+        if self.page is not None:
+            targets.append(self.pages.setdefault(self.page, {}))
+        for phases in targets:
+            stats = phases.setdefault(name, {"seconds": 0.0, "calls": 0, "net_blocks": 0})
+            stats["seconds"] += seconds
+            stats["calls"] += 1
+            stats["net_blocks"] += blocks
+
+    def wrap(self, func, name):
+        import inspect
+
+        if inspect.isgeneratorfunction(func):
+            # Time each step of a generator, not just its creation
+            def timed_steps(*args, **kwargs):
+                steps = func(*args, **kwargs)
+                while True:
+                    with self.phase(name):
+                        try:
+                            item = next(steps)
+                        except StopIteration:
+                            return
+                    yield item
+
+            return timed_steps
+
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+
+        return timed
+
+    @contextmanager
+    def instrument(self, module, phases):
+        """
+        Temporarily replaces module-level functions with timed wrappers.
+        phases maps function names in module to phase names.
+        """
+        originals = {name: getattr(module, name) for name in phases}
+        for name, phase in phases.items():
+            setattr(module, name, self.wrap(originals[name], phase))
+        try:
+            yield
+        finally:
+            for name, func in originals.items():
+                setattr(module, name, func)
+
+    def report(self):
+        pages = {}
+        for page, phases in self.pages.items():
+            seconds = sum(stats["seconds"] for stats in phases.values())
+            pages[page] = {"seconds": seconds, "phases": phases}
+        return {"phases": self.totals, "pages": pages}
+
+    def slowest(self, count=10):
+        pages = self.report()["pages"]
+        return sorted(pages.items(), key=lambda item: item[1]["seconds"], reverse=True)[:count]
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+    def print_summary(self, count=10):
+        print("Phase                  total ms    calls    net blocks")
+        for name, stats in sorted(self.totals.items(), key=lambda item: -item[1]["seconds"]):
+            print(
+                f"{name:<20} {stats['seconds'] * 1000:>10.2f} {stats['calls']:>8} "
+                f"{stats['net_blocks']:>13}"
+            )
+        print(f"Slowest {count} pages:")
+        for page, stats in self.slowest(count):
+            phases = stats["phases"]
+            worst = max(phases, key=lambda name: phases[name]["seconds"])
+            print(f"{stats['seconds'] * 1000:>10.2f} ms  {page}  (mostly {worst})")
+
+
+def profile_phase(profiler, name):
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
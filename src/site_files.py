@@ -0,0 +1,171 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+SITEMAP_FILE = "sitemap.xml"
+FEED_FILE = "atom.xml"
+SEARCH_INDEX_FILE = "search_index.json"
+
+# Pages under this content directory are posts and go into the feed
+FEED_DIR = "blog"
+FEED_TITLE = "Blog"
+SUMMARY_LENGTH = 200
+
+TERM_PATTERN = re.compile(r"[^\W_]{2,}")
+
+
+class TextStats:
+    """
+    Collects what the page index keeps about a page's plain text while the
+    text streams past: word count, the distinct search terms and a short
+    summary from the opening text.
+    """
+
+    def __init__(self):
+        self.word_count = 0
+        self.terms = set()
+        self.summary_parts = []
+        self.summary_length = 0
+
+    def add(self, texts):
+        for text in texts:
+            self.word_count += len(text.split())
+            self.terms.update(term.lower() for term in TERM_PATTERN.findall(text))
+            if self.summary_length < SUMMARY_LENGTH:
+                self.summary_parts.append(text)
+                self.summary_length += len(text)
+        return self
+
+    def summary(self):
+        text = " ".join(" ".join(self.summary_parts).split())
+        if len(text) <= SUMMARY_LENGTH:
+            return text
+        return text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+def page_link(site_url, base_path, entry):
+    return site_url.rstrip("/") + base_path.rstrip("/") + entry["path"]
+
+
+def build_search_index(index, base_path="/"):
+    """
+    Returns the client-side search index for the page index as compact JSON:
+    "pages" lists [url, title] per page id and "terms" maps each term to
+    the ids of the pages containing it, delta-encoded in ascending order.
+    Terms are read from the page index, so no page is re-tokenized.
+    """
+    prefix = base_path.rstrip("/")
+    pages = []
+    postings = {}
+    for page_id, relative_path in enumerate(sorted(index)):
+        entry = index[relative_path]
+        pages.append([prefix + entry["path"], entry["title"]])
+        for term in entry["terms"]:
+            postings.setdefault(term, []).append(page_id)
+    terms = {}
+    for term in sorted(postings):
+        ids = postings[term]
+        terms[term] = [ids[0]] + [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+    return json.dumps({"pages": pages, "terms": terms}, ensure_ascii=False, separators=(",", ":"))
+
+
+def render_sitemap(index, site_url, base_path="/"):
+    # Only needed with a site URL, and slow to import
+    from xml.sax.saxutils import escape
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for relative_path in sorted(index):
+        entry = index[relative_path]
+        lines.append(f"  <url><loc>{escape(page_link(site_url, base_path, entry))}</loc>")
+        if entry["date"]:
+            lines.append(f"    <lastmod>{escape(entry['date'])}</lastmod>")
+        lines.append("  </url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def feed_entries(index, content_dir):
+    """
+    Returns (updated, relative_path, entry) for every post, newest first.
+    Posts without a front matter date fall back to their source's mtime.
+    """
+    entries = []
+    for relative_path, entry in index.items():
+        if not relative_path.startswith(FEED_DIR + os.sep):
+            continue
+        if entry["date"]:
+            updated = atom_date(entry["date"])
+        else:
+            mtime = os.path.getmtime(os.path.join(content_dir, relative_path))
+            updated = datetime.fromtimestamp(mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        entries.append((updated, relative_path, entry))
+    entries.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return entries
+
+
+def render_feed(index, content_dir, site_url, base_path="/"):
+    from xml.sax.saxutils import escape, quoteattr
+
+    feed_url = site_url.rstrip("/") + base_path.rstrip("/") + "/" + FEED_FILE
+    home_url = site_url.rstrip("/") + base_path.rstrip("/") + "/"
+    entries = feed_entries(index, content_dir)
+    updated = entries[0][0] if entries else "1970-01-01T00:00:00Z"
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(FEED_TITLE)}</title>",
+        f"  <id>{escape(feed_url)}</id>",
+        f"  <link href={quoteattr(feed_url)} rel=\"self\"/>",
+        f"  <link href={quoteattr(home_url)}/>",
+        f"  <updated>{updated}</updated>",
+    ]
+    for entry_updated, relative_path, entry in entries:
+        url = page_link(site_url, base_path, entry)
+        lines += [
+            "  <entry>",
+            f"    <title>{escape(entry['title'])}</title>",
+            f"    <id>{escape(url)}</id>",
+            f"    <link href={quoteattr(url)}/>",
+            f"    <updated>{entry_updated}</updated>",
+        ]
+        for tag in entry["tags"]:
+            lines.append(f"    <category term={quoteattr(tag)}/>")
+        if entry["summary"]:
+            lines.append(f"    <summary>{escape(entry['summary'])}</summary>")
+        lines.append("  </entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def atom_date(date):
+    # Front matter dates are usually bare days; Atom wants a full timestamp
+    if len(date) == 10:
+        return date + "T00:00:00Z"
+    return date
+
+
+def write_site_files(index, dest_dir, content_dir, writer, base_path="/", site_url=None):
+    """
+    Writes the search index and, when the site's absolute URL is known, the
+    sitemap and the Atom feed of blog posts, removing ones left by a build
+    that had a URL. Returns the paths written. Outputs whose bytes did not
+    change are left alone by the writer.
+    """
+    outputs = {SEARCH_INDEX_FILE: build_search_index(index, base_path)}
+    if site_url:
+        outputs[SITEMAP_FILE] = render_sitemap(index, site_url, base_path)
+        outputs[FEED_FILE] = render_feed(index, content_dir, site_url, base_path)
+    else:
+        for name in (SITEMAP_FILE, FEED_FILE):
+            if os.path.exists(os.path.join(dest_dir, name)):
+                os.remove(os.path.join(dest_dir, name))
+    paths = []
+    for name, content in outputs.items():
+        path = os.path.join(dest_dir, name)
+        writer.write(path, content)
+        paths.append(path)
+    return paths
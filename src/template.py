@@ -0,0 +1,140 @@
+import os
+import re
+
+from file_utils import read_file
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+PARTIAL_PATTERN = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+ROOT_LINK_PATTERN = re.compile(r'((?:href|src)=")/(?!/)')
+LINK_PATTERN = re.compile(r'(?:href|src)="(/(?!/)[^"]*)"')
+ID_PATTERN = re.compile(r'\bid="([^"]+)"')
+
+
+class Template:
+    """
+    A template split into literal segments and named slots. Rendering a page
+    copies the segment list, drops the values into the slot positions and
+    joins once. dependencies lists the files the template was read from,
+    links the root-relative href/src URLs in its own markup and anchors
+    the id attributes in it. names holds the placeholder names it fills.
+    """
+
+    def __init__(self, segments, slots, dependencies=(), links=(), anchors=()):
+        self.segments = segments
+        self.slots = slots
+        self.names = frozenset(name for index, name in slots)
+        self.dependencies = dependencies
+        self.links = links
+        self.anchors = anchors
+
+    def render(self, **values):
+        parts = list(self.segments)
+        for index, name in self.slots:
+            parts[index] = values.get(name, "")
+        return "".join(parts)
+
+    def iter_render(self, **values):
+        """
+        Yields the rendered page piece by piece. A value may be a string or an
+        iterable of strings, such as HTMLNode.iter_html(), which is streamed
+        through without being joined.
+        """
+        slot_names = dict(self.slots)
+        for index, segment in enumerate(self.segments):
+            name = slot_names.get(index)
+            if name is None:
+                yield segment
+                continue
+            value = values.get(name, "")
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def __eq__(self, other):
+        return self.segments == other.segments and self.slots == other.slots
+
+    def __repr__(self):
+        return f"Template({self.segments}, {self.slots})"
+
+
+def compile_template(text, base_path="/"):
+    """
+    Compiles template text for a given base path. {{ BasePath }} and the
+    root-relative href/src links of the template's own markup are resolved
+    here, once, so rendering never rescans the page content.
+    """
+    prefix = base_path.rstrip("/")
+    links = tuple(LINK_PATTERN.findall(text))
+    anchors = tuple(ID_PATTERN.findall(text))
+    segments = []
+    slots = []
+    literal = ""
+    position = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        literal += _prefix_root_links(text[position : match.start()], prefix)
+        position = match.end()
+        name = match.group(1)
+        if name == "BasePath":
+            literal += prefix
+            continue
+        segments.append(literal)
+        slots.append((len(segments), name))
+        segments.append("")
+        literal = ""
+    segments.append(literal + _prefix_root_links(text[position:], prefix))
+    return Template(segments, slots, links=links, anchors=anchors)
+
+
+def _prefix_root_links(text, prefix):
+    return ROOT_LINK_PATTERN.sub(lambda match: f"{match.group(1)}{prefix}/", text)
+
+
+def expand_partials(path, including=()):
+    """
+    Reads the template at path with every {{> partial }} replaced by the
+    partial's own expanded text. Partial paths are relative to the file
+    that includes them. Returns (text, [path, *partial paths]).
+    """
+    path = os.path.normpath(path)
+    if path in including:
+        raise ValueError(f"template include cycle: {' -> '.join(including + (path,))}")
+    text = read_file(path)
+    dependencies = [path]
+    pieces = []
+    position = 0
+    for match in PARTIAL_PATTERN.finditer(text):
+        pieces.append(text[position : match.start()])
+        position = match.end()
+        partial_path = os.path.join(os.path.dirname(path), match.group(1))
+        partial_text, partial_dependencies = expand_partials(partial_path, including + (path,))
+        pieces.append(partial_text)
+        dependencies.extend(dep for dep in partial_dependencies if dep not in dependencies)
+    pieces.append(text[position:])
+    return "".join(pieces), dependencies
+
+
+def load_template(path, base_path="/"):
+    text, dependencies = expand_partials(path)
+    template = compile_template(text, base_path)
+    template.dependencies = tuple(dependencies)
+    return template
+
+
+class TemplateLoader:
+    """
+    Compiles each template a build uses once, on first use. Pages pick a
+    template other than the default with a "template" front matter key.
+    """
+
+    def __init__(self, base_path="/"):
+        self.base_path = base_path
+        self.templates = {}
+
+    def load(self, path):
+        path = os.path.normpath(path)
+        template = self.templates.get(path)
+        if template is None:
+            template = load_template(path, self.base_path)
+            self.templates[path] = template
+        return template
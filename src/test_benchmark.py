@@ -0,0 +1,116 @@
+import os
+import random
+import tempfile
+import unittest
+
+from benchmark import (
+    bench_build,
+    bench_escape,
+    bench_extract,
+    bench_pipeline,
+    bench_tree,
+    compare_results,
+    generate_content,
+    import_times,
+    link_heavy_paragraph,
+    resplit_nodes_link,
+    synthetic_page,
+    unescaped_html,
+)
+from inline_markdown import split_nodes_link
+from markdown_blocks import markdown_to_html_node
+from textnode import TextNode, TextType
+
+
+class TestSyntheticContent(unittest.TestCase):
+    def test_generate_content_is_reproducible(self):
+        trees = []
+        for _ in range(2):
+            with tempfile.TemporaryDirectory() as tmp:
+                generate_content(tmp, pages=5, blocks=10, depth=3)
+                tree = {}
+                for root, dirs, files in os.walk(tmp):
+                    for file in files:
+                        path = os.path.join(root, file)
+                        with open(path) as f:
+                            tree[os.path.relpath(path, tmp)] = f.read()
+                trees.append(tree)
+        self.assertEqual(len(trees[0]), 5)
+        self.assertEqual(trees[0], trees[1])
+
+    def test_synthetic_pages_parse(self):
+        markdown = synthetic_page(random.Random(3), 50, {"paragraph": 1, "code": 1, "olist": 1}, 0.2)
+        html = markdown_to_html_node(markdown).to_html()
+        self.assertIn("<ol>", html)
+        self.assertIn("<pre>", html)
+        self.assertIn("<a href=", html)
+
+    def test_bench_build(self):
+        metrics = bench_build(pages=3, blocks=5)
+        self.assertEqual(
+            sorted(metrics),
+            [
+                "cold_build_pages_per_s",
+                "noop_build_pages_per_s",
+                "uncached_build_pages_per_s",
+                "warm_build_pages_per_s",
+            ],
+        )
+
+    def test_bench_pipeline_renders_every_page(self):
+        # bench_pipeline raises if any page fails to generate
+        rows = bench_pipeline(pages=3, blocks=5, jobs=1, read_delay=0)
+        self.assertEqual([row["mode"] for row in rows], ["pool", "pipeline"])
+
+
+class TestExtractBenchmark(unittest.TestCase):
+    def test_sliced_split_matches_resplitting(self):
+        nodes = [TextNode(link_heavy_paragraph(200), TextType.TEXT)]
+        self.assertEqual(split_nodes_link(nodes), resplit_nodes_link(nodes))
+        [result] = bench_extract(link_counts=(10,), repeat=1)
+        self.assertEqual(sorted(result), ["links", "resplit_ms", "sliced_ms", "speedup"])
+
+
+class TestEscapeBenchmark(unittest.TestCase):
+    def test_escaping_serializer_matches_on_plain_content(self):
+        markdown = synthetic_page(random.Random(5), 40, {"paragraph": 3, "ulist": 1, "code": 1}, 0.2)
+        node = markdown_to_html_node(markdown)
+        self.assertEqual(node.to_html(), unescaped_html(node))
+        [result] = bench_escape(blocks=20, repeat=1)
+        self.assertGreater(result["escaped_ms"], 0)
+
+
+class TestTreeBenchmark(unittest.TestCase):
+    def test_reports_each_page_size(self):
+        rows = bench_tree(block_counts=(5, 10), repeat=1)
+        self.assertEqual([row["blocks"] for row in rows], [5, 10])
+        self.assertLess(rows[0]["encoded_kb"], rows[0]["pickled_kb"])
+
+
+class TestStartupBenchmark(unittest.TestCase):
+    def test_import_times_keeps_nesting(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:       300 |        420 | io\n"
+            "import time:        50 |         50 |     re._parser\n"
+            "import time:       900 |        950 |   re\n"
+            "import time:       100 |       1050 | main\n"
+        )
+        self.assertEqual(
+            import_times(stderr),
+            {"_io": (120, 1), "io": (420, 0), "re._parser": (50, 2), "re": (950, 1), "main": (1050, 0)},
+        )
+
+
+class TestCompare(unittest.TestCase):
+    def test_flags_throughput_drops_past_threshold(self):
+        baseline = {"metrics": {"a": 100.0, "b": 100.0, "c": 100.0}}
+        current = {"metrics": {"a": 95.0, "b": 80.0, "c": 150.0}}
+        rows, regressions = compare_results(baseline, current, threshold=0.1)
+        self.assertEqual(regressions, ["b"])
+        self.assertEqual([row["metric"] for row in rows], ["a", "b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
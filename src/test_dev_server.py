@@ -0,0 +1,114 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from dev_server import DevServer, changed_paths, inject_reload_script, snapshot, watch
+
+
+class TestWatch(unittest.TestCase):
+    def test_snapshot_detects_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            page = os.path.join(tmp, "blog", "index.md")
+            os.makedirs(os.path.dirname(page))
+            with open(page, "w") as f:
+                f.write("# One")
+            before = snapshot([tmp])
+            self.assertEqual(changed_paths(before, snapshot([tmp])), [])
+            with open(page, "w") as f:
+                f.write("# Two!")
+            other = os.path.join(tmp, "new.md")
+            with open(other, "w") as f:
+                f.write("# New")
+            self.assertEqual(changed_paths(before, snapshot([tmp])), sorted([page, other]))
+
+    def test_watch_follows_the_paths_after_each_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.html")
+            partial = os.path.join(tmp, "partials", "nav.html")
+            os.makedirs(os.path.dirname(partial))
+            for path in (template, partial):
+                with open(path, "w") as f:
+                    f.write("<nav></nav>")
+            watched = [template]
+            rebuilds = []
+
+            def rebuild(changed):
+                rebuilds.append(changed)
+                # As if the build found the template now includes the partial
+                watched.append(partial)
+
+            class Server:
+                def reload(self):
+                    pass
+
+            async def edit_and_wait(path, count):
+                with open(path, "w") as f:
+                    f.write("<nav>edited</nav>")
+                while len(rebuilds) < count:
+                    await asyncio.sleep(0.01)
+
+            async def scenario():
+                task = asyncio.create_task(watch(lambda: list(watched), rebuild, Server(), interval=0.01))
+                await asyncio.sleep(0.05)
+                await edit_and_wait(template, 1)
+                await edit_and_wait(partial, 2)
+                task.cancel()
+
+            asyncio.run(asyncio.wait_for(scenario(), 5))
+            self.assertEqual(rebuilds, [[template], [partial]])
+
+    def test_inject_reload_script(self):
+        html = inject_reload_script(b"<html><body><p>hi</p></body></html>")
+        self.assertTrue(html.startswith(b"<html><body><p>hi</p><script>"))
+        self.assertTrue(html.endswith(b"</script></body></html>"))
+
+
+class TestDevServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.tmp.name, "blog"))
+        with open(os.path.join(self.tmp.name, "blog", "index.html"), "w") as f:
+            f.write("<html><body>post</body></html>")
+        self.server = DevServer(self.tmp.name, port=0)
+        await self.server.start()
+        self.port = self.server.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        for writer in self.server.clients:
+            writer.close()
+        self.server.server.close()
+        await self.server.server.wait_closed()
+        self.tmp.cleanup()
+
+    async def get(self, path):
+        reader, writer = await asyncio.open_connection("localhost", self.port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        return reader, writer
+
+    async def test_serves_directory_index_with_reload_script(self):
+        reader, writer = await self.get("/blog/")
+        response = await reader.read()
+        writer.close()
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 OK"))
+        self.assertIn(b"post<script>", response)
+
+    async def test_refuses_paths_outside_root(self):
+        reader, writer = await self.get("/../../etc/passwd")
+        response = await reader.read()
+        writer.close()
+        self.assertTrue(response.startswith(b"HTTP/1.1 404"))
+
+    async def test_pushes_reload_event(self):
+        reader, writer = await self.get("/__reload")
+        headers = await reader.readuntil(b"\r\n\r\n")
+        self.assertIn(b"text/event-stream", headers)
+        self.server.reload()
+        event = await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)
+        writer.close()
+        self.assertEqual(event, b"event: reload\ndata: reload\n\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
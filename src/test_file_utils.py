@@ -0,0 +1,146 @@
+import os
+import tempfile
+import time
+import unittest
+
+from file_utils import OutputWriter, iter_mapped_lines, sweep_temp_files, sync_tree
+from fixtures import write
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        write(os.path.join(self.src, "index.css"), "body {}")
+        write(os.path.join(self.src, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_copies_then_skips_unchanged(self):
+        first = sync_tree(self.src, self.dest)
+        self.assertEqual(first["copied"], ["images/a.png".replace("/", os.sep), "index.css"])
+        self.assertEqual(read(os.path.join(self.dest, "images", "a.png")), "png")
+        second = sync_tree(self.src, self.dest, first["files"])
+        self.assertEqual(second["copied"], [])
+        self.assertEqual(second["removed"], [])
+
+    def test_same_filesystem_uses_hardlinks(self):
+        sync_tree(self.src, self.dest)
+        self.assertTrue(
+            os.path.samefile(os.path.join(self.src, "index.css"), os.path.join(self.dest, "index.css"))
+        )
+
+    def test_replaced_source_is_recopied_without_touching_old_link(self):
+        first = sync_tree(self.src, self.dest)
+        source = os.path.join(self.src, "index.css")
+        os.remove(source)
+        write(source, "body { color: red; }")
+        result = sync_tree(self.src, self.dest, first["files"])
+        self.assertEqual(result["copied"], ["index.css"])
+        self.assertEqual(read(os.path.join(self.dest, "index.css")), "body { color: red; }")
+
+    def test_removes_only_previously_synced_files(self):
+        first = sync_tree(self.src, self.dest)
+        write(os.path.join(self.dest, "index.html"), "<p>page</p>")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        result = sync_tree(self.src, self.dest, first["files"])
+        self.assertEqual(result["removed"], [os.path.join("images", "a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_checksum_skips_touched_but_identical_files(self):
+        write(os.path.join(self.dest, "index.css"), "body {}")
+        write(os.path.join(self.dest, "images", "a.png"), "png")
+        future = time.time() + 100
+        os.utime(os.path.join(self.src, "index.css"), (future, future))
+        result = sync_tree(self.src, self.dest, [], checksum=True)
+        self.assertEqual(result["copied"], [])
+        self.assertEqual(
+            os.stat(os.path.join(self.dest, "index.css")).st_mtime_ns,
+            os.stat(os.path.join(self.src, "index.css")).st_mtime_ns,
+        )
+
+
+class TestMappedLines(unittest.TestCase):
+    def test_iter_mapped_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "wb") as f:
+                f.write("# Título\r\n\nlast line".encode("utf-8"))
+            self.assertEqual(list(iter_mapped_lines(path)), ["# Título", "", "last line"])
+            with open(path, "wb") as f:
+                pass
+            self.assertEqual(list(iter_mapped_lines(path)), [])
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "blog", "post", "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_creates_directories_and_skips_identical_writes(self):
+        writer = OutputWriter()
+        writer.write(self.path, "<p>one</p>")
+        os.utime(self.path, ns=(0, 0))
+        writer.write(self.path, "<p>one</p>")
+        writer.write_chunks(self.path, ["<p>", "one", "</p>"])
+        self.assertEqual((writer.written, writer.skipped), (1, 2))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        writer.write(self.path, "<p>two</p>")
+        self.assertEqual(read(self.path), "<p>two</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+        self.assertEqual(os.stat(self.path).st_mode & 0o044, 0o044 & ~_umask())
+
+    def test_streams_past_buffer_limit(self):
+        writer = OutputWriter(buffer_limit=8)
+        chunks = [f"<p>{i}</p>" for i in range(100)]
+        writer.write_chunks(self.path, chunks)
+        writer.write_chunks(self.path, iter(chunks))
+        self.assertEqual((writer.written, writer.skipped), (1, 1))
+        self.assertEqual(read(self.path), "".join(chunks))
+
+    def test_failed_write_keeps_previous_output(self):
+        writer = OutputWriter(buffer_limit=8)
+        writer.write(self.path, "<p>old</p>")
+
+        def broken():
+            yield "<p>partial" * 10
+            raise ValueError("invalid HTML")
+
+        with self.assertRaises(ValueError):
+            writer.write_chunks(self.path, broken())
+        self.assertEqual(read(self.path), "<p>old</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_failed_replace_leaves_no_temporary_file(self):
+        os.makedirs(self.path)
+        with self.assertRaises(OSError):
+            OutputWriter().write(self.path, "<p>one</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_sweep_temp_files(self):
+        write(self.path, "<p>one</p>")
+        write(os.path.join(self.tmp.name, "blog", ".index.html.x1y2.tmp"), "<p>")
+        self.assertEqual(sweep_temp_files(self.tmp.name), 1)
+        self.assertEqual(sweep_temp_files(self.tmp.name), 0)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, "blog")), ["post"])
+
+
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from front_matter import read_front_matter, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_no_front_matter(self):
+        markdown = "# Title\n\nBody"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_yaml_style(self):
+        meta, body = split_front_matter(
+            "---\nTitle: \"Hello: world\"\ntags: [a, 'b c']\ndraft: yes\n---\n# Title\n\nBody"
+        )
+        self.assertEqual(meta, {"title": "Hello: world", "tags": ["a", "b c"], "draft": "yes"})
+        self.assertEqual(body, "# Title\n\nBody")
+
+    def test_toml_style(self):
+        meta, body = split_front_matter('+++\ndate = "2024-01-02"\n+++\nText')
+        self.assertEqual(meta, {"date": "2024-01-02"})
+        self.assertEqual(body, "Text")
+
+    def test_unclosed_front_matter(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: x\n# Title")
+
+    def test_read_front_matter_leaves_remaining_lines(self):
+        meta, lines = read_front_matter(iter(["---", "title: x", "---", "# T", "body"]))
+        self.assertEqual(meta, {"title": "x"})
+        self.assertEqual(list(lines), ["# T", "body"])
+        meta, lines = read_front_matter(["# T", "body"])
+        self.assertEqual((meta, list(lines)), ({}, ["# T", "body"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_html
 
 class testHTMLNode(unittest.TestCase):
     def test_props_to_html_single(self):
@@ -19,6 +20,14 @@ class testHTMLNode(unittest.TestCase):
         node = HTMLNode(tag="div")
         self.assertEqual(node.props_to_html(), "")
 
+    def test_compact_nodes(self):
+        leaf = LeafNode("".join(["h", "1"]), "Title", {})
+        parent = ParentNode("div", [leaf])
+        self.assertFalse(hasattr(leaf, "__dict__"))
+        self.assertFalse(hasattr(parent, "__dict__"))
+        self.assertIs(leaf.tag, LeafNode("h1", "other").tag)
+        self.assertIsNone(leaf.props)
+
 
 class TestLeafNode(unittest.TestCase):
     def test_leaf_to_html_p(self):
@@ -83,6 +92,68 @@ class TestParentNode(unittest.TestCase):
         expected_html = "<div><b>bold</b><span>inside span</span></div>"
         self.assertEqual(parent.to_html(), expected_html)
 
+    def test_iter_html_matches_to_html(self):
+        parent = ParentNode(
+            "ul",
+            [ParentNode("li", [LeafNode(None, "item "), LeafNode("b", str(i))]) for i in range(3)],
+            {"class": "list"},
+        )
+        chunks = list(parent.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), parent.to_html())
+        self.assertEqual(
+            parent.to_html(),
+            '<ul class="list"><li>item <b>0</b></li><li>item <b>1</b></li><li>item <b>2</b></li></ul>',
+        )
+
+    def test_write_html(self):
+        parent = ParentNode("div", [LeafNode("p", "streamed")])
+        fp = io.StringIO()
+        parent.write_html(fp)
+        self.assertEqual(fp.getvalue(), "<div><p>streamed</p></div>")
+
+    def test_iter_html_deep_tree(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + len("leaf"))
+
+    def test_iter_html_invalid_descendant(self):
+        parent = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            parent.to_html()
+
+    def test_escapes_text_and_attributes(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode(None, "[< Back] & \"home\""),
+                LeafNode("a", "x > y", {"href": '/search?q=a&b="c"'}),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(),
+            "<p>[&lt; Back] &amp; &quot;home&quot;"
+            '<a href="/search?q=a&amp;b=&quot;c&quot;">x &gt; y</a></p>',
+        )
+
+    def test_escape_fast_path_returns_same_string(self):
+        text = "nothing special here"
+        self.assertIs(escape_html(text), text)
+
+    def test_props_cache_follows_mutation(self):
+        node = LeafNode("a", "x", {"href": "/a"})
+        self.assertEqual(node.props_to_html(), ' href="/a"')
+        node.props["href"] = "/site/a"
+        self.assertEqual(node.props_to_html(), ' href="/site/a"')
+        self.assertEqual(LeafNode("a", "y", {"href": "/a"}).props_to_html(), ' href="/a"')
+
+    def test_iter_text(self):
+        parent = ParentNode("p", [LeafNode(None, "plain "), ParentNode("b", [LeafNode("i", "bold")])])
+        self.assertEqual(list(parent.iter_text()), ["plain ", "bold"])
+
 if __name__ == "__main__":
     unittest.main()
 
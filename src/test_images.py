@@ -0,0 +1,132 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+import images
+from htmlnode import LeafNode, ParentNode
+from images import annotate_images, image_size, process_images
+
+
+def png(width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x80\x40\x20" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self.size_of(png(30, 20)), (30, 20))
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 64, 48) + b"\x00" * 20), (64, 48))
+        jpeg = (
+            b"\xff\xd8"
+            + b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+            + b"\xff\xc0" + struct.pack(">HBHH", 17, 8, 600, 800) + b"\x00" * 10
+        )
+        self.assertEqual(self.size_of(jpeg), (800, 600))
+        webp = b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 8 + b"\x63\x00\x00\x31\x00\x00"
+        self.assertEqual(self.size_of(webp), (100, 50))
+        self.assertIsNone(self.size_of(b"not an image at all"))
+
+    def test_truncated_headers(self):
+        jpeg = b"\xff\xd8\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9 + b"\xff\xc0\x00\x11"
+        webp = b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 8 + b"\x63\x00\x00\x31\x00\x00"
+        for data in (png(30, 20)[:20], b"GIF89a\x40", jpeg, jpeg[:21], b"\xff\xd8\xff\xe0\x00\x00", webp[:27]):
+            self.assertIsNone(self.size_of(data), data)
+
+
+class TestProcessImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write_png(1000, 10)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_png(self, width, height):
+        with open(os.path.join(self.static, "images", "a.png"), "wb") as f:
+            f.write(png(width, height))
+
+    def test_dimensions_and_change_detection(self):
+        index, changed = process_images(self.static, self.dest, {}, None)
+        entry = index[os.path.join("images", "a.png")]
+        self.assertEqual((entry["width"], entry["height"], entry["variants"]), (1000, 10, []))
+        self.assertEqual(changed, {os.path.join("images", "a.png")})
+        self.assertEqual(process_images(self.static, self.dest, index, None), (index, set()))
+
+    @unittest.skipIf(images.Image is None, "Pillow is not installed")
+    def test_variants_are_cached_by_content(self):
+        index, changed = process_images(self.static, self.dest, {}, self.cache, jobs=2)
+        variants = index[os.path.join("images", "a.png")]["variants"]
+        self.assertEqual([width for path, width in variants], [480, 960])
+        for path, width in variants:
+            self.assertTrue(os.path.exists(os.path.join(self.dest, path)))
+        self.assertEqual(len(os.listdir(self.cache)), 2)
+
+        self.write_png(500, 10)
+        new_index, changed = process_images(self.static, self.dest, index, self.cache)
+        self.assertEqual(changed, {os.path.join("images", "a.png")})
+        self.assertFalse(os.path.exists(os.path.join(self.dest, variants[0][0])))
+        self.assertEqual(len(os.listdir(self.cache)), 3)
+
+
+class TestAnnotateImages(unittest.TestCase):
+    def test_adds_size_srcset_and_lazy_loading(self):
+        index = {
+            os.path.join("images", "a.png"): {
+                "width": 1000,
+                "height": 10,
+                "variants": [[os.path.join("images", "a-1-480.webp"), 480]],
+            }
+        }
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "a"}),
+                LeafNode("img", "", {"src": "https://example.com/b.png", "alt": "b"}),
+            ],
+        )
+        annotate_images(node, index, "/site/")
+        self.assertEqual(
+            node.children[0].props,
+            {
+                "src": "/images/a.png",
+                "alt": "a",
+                "width": "1000",
+                "height": "10",
+                "srcset": "/site/images/a-1-480.webp 480w, /site/images/a.png 1000w",
+                "sizes": "(max-width: 1000px) 100vw, 1000px",
+                "loading": "lazy",
+            },
+        )
+        self.assertEqual(
+            node.children[1].props, {"src": "https://example.com/b.png", "alt": "b", "loading": "lazy"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,367 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fixtures import write
+from incremental import (
+    BUILD_MARKER_FILE,
+    MANIFEST_FILE,
+    build_site,
+    check_site,
+    explain,
+    load_manifest,
+    save_manifest,
+)
+from page_index import PAGE_INDEX_FILE, load_page_index
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self.dest = os.path.join(root, "docs")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nBody")
+        write(os.path.join(self.static, "index.css"), "body {}")
+        write(self.template, TEMPLATE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, base_path="/", jobs=1):
+        return build_site(self.content, self.static, self.template, self.dest, base_path, jobs)
+
+    def read_outputs(self):
+        outputs = {}
+        for root, dirs, files in os.walk(self.dest):
+            for file in files:
+                if file.endswith(".html"):
+                    path = os.path.join(root, file)
+                    with open(path, encoding="utf-8") as f:
+                        outputs[os.path.relpath(path, self.dest)] = f.read()
+        return outputs
+
+    def test_first_build_generates_everything(self):
+        result = self.build()
+        self.assertEqual(len(result["generated"]), 2)
+        self.assertEqual(len(result["copied"]), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, MANIFEST_FILE)))
+        manifest = load_manifest(self.dest)
+        self.assertEqual(manifest["base_path"], "/")
+        self.assertIn(os.path.join("blog", "post", "index.md"), manifest["pages"])
+
+    def test_unchanged_rebuild_does_nothing(self):
+        self.build()
+        result = self.build()
+        self.assertEqual(len(result.pop("index")), 2)
+        self.assertEqual(
+            result,
+            {
+                "generated": [],
+                "copied": [],
+                "removed": [],
+                "errors": [],
+                "written": 0,
+                "skipped": 0,
+                "cache_hits": 0,
+                "cache_misses": 0,
+                "broken_links": [],
+            },
+        )
+
+    def test_unchanged_rebuild_writes_no_metadata(self):
+        self.build()
+        paths = [os.path.join(self.dest, name) for name in (MANIFEST_FILE, PAGE_INDEX_FILE, "search_index.json")]
+        for path in paths:
+            os.utime(path, ns=(0, 0))
+        self.build()
+        self.assertEqual([os.stat(path).st_mtime_ns for path in paths], [0, 0, 0])
+        os.remove(paths[-1])
+        self.build()
+        self.assertTrue(os.path.exists(paths[-1]))
+
+    def test_killed_build_leaves_no_temporary_files(self):
+        self.build()
+        marker = os.path.join(self.dest, BUILD_MARKER_FILE)
+        self.assertFalse(os.path.exists(marker))
+        # What a build killed while writing index.html leaves behind
+        temp = os.path.join(self.dest, ".index.html.abc123.tmp")
+        write(temp, "<title>")
+        write(marker, "")
+        self.build()
+        self.assertFalse(os.path.exists(temp))
+        self.assertFalse(os.path.exists(marker))
+
+    def test_sources_are_hashed_only_when_their_stat_changes(self):
+        self.build()
+        source = os.path.join(self.content, "index.md")
+        stat = os.stat(source)
+        write(source, "# Home\n\nWelcom!")
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.build()["generated"], [])
+        result = build_site(self.content, self.static, self.template, self.dest, checksum=True)
+        self.assertEqual(result["generated"], [os.path.join(self.dest, "index.html")])
+
+    def test_only_changed_page_is_regenerated(self):
+        self.build()
+        write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome back")
+        result = self.build()
+        self.assertEqual(result["generated"], [os.path.join(self.dest, "index.html")])
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertIn("Welcome back", f.read())
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        result = self.build()
+        self.assertEqual(len(result["removed"]), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+
+    def test_identical_output_is_not_rewritten(self):
+        self.build()
+        index = os.path.join(self.dest, "index.html")
+        os.utime(index, ns=(0, 0))
+        os.remove(os.path.join(self.dest, MANIFEST_FILE))
+        result = self.build()
+        self.assertEqual((result["written"], result["skipped"]), (0, 2))
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+
+    def test_template_or_base_path_change_rebuilds_all(self):
+        self.build()
+        write(self.template, TEMPLATE + "<footer></footer>")
+        self.assertEqual(len(self.build()["generated"]), 2)
+        self.assertEqual(len(self.build("/site/")["generated"]), 2)
+
+    def test_output_version_change_rebuilds_all(self):
+        self.build()
+        manifest = load_manifest(self.dest)
+        manifest["output_version"] -= 1
+        save_manifest(self.dest, manifest)
+        self.assertEqual(
+            len(check_site(self.content, self.static, self.template, self.dest)["pages"]), 2
+        )
+        self.assertEqual(len(self.build()["generated"]), 2)
+        self.assertEqual(self.build()["generated"], [])
+
+    def test_minify_and_compress(self):
+        write(self.template, "<html>\n  <title>{{ Title }}</title>\n  {{ Content }}\n</html>")
+        write(os.path.join(self.content, "index.md"), "# Home\n\n```\nkeep   this\n```")
+        self.build()
+        result = build_site(
+            self.content, self.static, self.template, self.dest, minify=True, compress=True
+        )
+        self.assertEqual(len(result["generated"]), 2)
+        self.assertGreaterEqual(result["compressed"], 3)
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(),
+                "<html>\n<title>Home</title>\n"
+                "<div><h1>Home</h1><pre><code>keep   this\n</code></pre></div>\n</html>",
+            )
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.css.gz")))
+
+    def test_parallel_build_matches_serial(self):
+        for i in range(6):
+            write(os.path.join(self.content, f"page{i}.md"), f"# Page {i}\n\n- item **{i}**")
+        serial = self.build()
+        serial_outputs = self.read_outputs()
+        os.remove(os.path.join(self.dest, MANIFEST_FILE))
+        parallel = self.build(jobs=3)
+        self.assertEqual(parallel["generated"], serial["generated"])
+        self.assertEqual(self.read_outputs(), serial_outputs)
+
+    def test_tree_cache_reports_hits(self):
+        cache_path = os.path.join(self.tmp.name, "cache.sqlite")
+        first = build_site(self.content, self.static, self.template, self.dest, "/", 1, cache_path)
+        outputs = self.read_outputs()
+        os.remove(os.path.join(self.dest, MANIFEST_FILE))
+        second = build_site(self.content, self.static, self.template, self.dest, "/", 2, cache_path)
+        # Two page trees and their four blocks miss, then the trees hit
+        self.assertEqual((first["cache_hits"], first["cache_misses"]), (0, 2))
+        self.assertEqual((second["cache_hits"], second["cache_misses"]), (2, 0))
+        self.assertEqual(self.read_outputs(), outputs)
+
+    def test_errors_are_collected_per_file(self):
+        write(os.path.join(self.content, "broken.md"), "no title here")
+        result = self.build(jobs=2)
+        self.assertEqual(len(result["generated"]), 2)
+        self.assertEqual(len(result["errors"]), 1)
+        from_path, error = result["errors"][0]
+        self.assertEqual(from_path, os.path.join(self.content, "broken.md"))
+        self.assertIn("No H1 header", error)
+        self.assertIsNone(load_manifest(self.dest)["pages"]["broken.md"])
+        self.assertEqual(len(self.build()["errors"]), 1)
+
+    def test_deleting_a_failing_source_removes_its_output(self):
+        source = os.path.join(self.content, "about.md")
+        write(source, "# About")
+        self.build()
+        write(source, "no title here")
+        self.assertEqual(len(self.build()["errors"]), 1)
+        os.remove(source)
+        output = os.path.join(self.dest, "about.html")
+        self.assertEqual(self.build()["removed"], [output])
+        self.assertFalse(os.path.exists(output))
+
+    def test_page_index_is_kept_between_builds(self):
+        write(
+            os.path.join(self.content, "index.md"),
+            "---\ntitle: Welcome\ndate: 2024-05-01\ntags: [intro, home]\n---\n# Home\n\nHello there",
+        )
+        first = self.build()["index"]
+        self.assertEqual(
+            first["index.md"],
+            {
+                "title": "Welcome",
+                "date": "2024-05-01",
+                "tags": ["intro", "home"],
+                "word_count": 3,
+                "terms": ["hello", "home", "there"],
+                "summary": "Home Hello there",
+                "meta": {},
+                "links": [],
+                "anchors": [],
+                "broken_links": [],
+                "targets": [],
+                "path": "/",
+                "hash": load_manifest(self.dest)["pages"]["index.md"],
+            },
+        )
+        self.assertEqual(first[os.path.join("blog", "post", "index.md")]["path"], "/blog/post/")
+        self.assertEqual(load_page_index(self.dest), first)
+
+        # A no-op build leaves the index file alone
+        index_path = os.path.join(self.dest, PAGE_INDEX_FILE)
+        os.utime(index_path, ns=(0, 0))
+        self.build()
+        self.assertEqual(os.stat(index_path).st_mtime_ns, 0)
+
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        second = self.build()
+        self.assertEqual(second["generated"], [])
+        self.assertEqual(list(second["index"]), ["index.md"])
+        self.assertEqual(load_page_index(self.dest), second["index"])
+
+    def test_site_files_follow_the_page_index(self):
+        build_site(
+            self.content, self.static, self.template, self.dest, "/site/", site_url="https://example.com"
+        )
+        with open(os.path.join(self.dest, "sitemap.xml"), encoding="utf-8") as f:
+            self.assertIn("<loc>https://example.com/site/blog/post/</loc>", f.read())
+        with open(os.path.join(self.dest, "atom.xml"), encoding="utf-8") as f:
+            feed = f.read()
+        self.assertIn("<title>Post</title>", feed)
+        self.assertNotIn("<title>Home</title>", feed)
+
+        write(os.path.join(self.content, "blog", "new", "index.md"), "# New\n\nFresh words")
+        result = self.build("/site/")
+        self.assertEqual(result["generated"], [os.path.join(self.dest, "blog", "new", "index.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "sitemap.xml")))
+        with open(os.path.join(self.dest, "search_index.json"), encoding="utf-8") as f:
+            search = json.load(f)
+        self.assertEqual(search["pages"][0], ["/site/blog/new/", "New"])
+        self.assertEqual(search["terms"]["fresh"], [0])
+
+    def test_template_dependencies_rebuild_only_their_pages(self):
+        root = self.tmp.name
+        write(os.path.join(root, "partials", "nav.html"), "<nav>v1</nav>")
+        write(os.path.join(root, "post.html"), '{{> partials/nav.html }}<img src="/index.css">{{ Content }}')
+        write(
+            os.path.join(self.content, "blog", "post", "index.md"),
+            "---\ntemplate: post.html\n---\n# Post\n\nBody",
+        )
+        self.assertEqual(len(self.build()["generated"]), 2)
+        post = os.path.join(self.dest, "blog", "post", "index.html")
+
+        write(os.path.join(root, "partials", "nav.html"), "<nav>v2</nav>")
+        self.assertEqual(self.build()["generated"], [post])
+        with open(post, encoding="utf-8") as f:
+            self.assertIn("<nav>v2</nav>", f.read())
+
+        write(self.template, TEMPLATE + "<footer></footer>")
+        self.assertEqual(self.build()["generated"], [os.path.join(self.dest, "index.html")])
+
+    def test_page_list_is_only_built_when_used(self):
+        with mock.patch("incremental.render_page_list", side_effect=AssertionError):
+            self.assertEqual(len(self.build()["generated"]), 2)
+            write(os.path.join(self.content, "blog", "new.md"), "# New")
+            self.assertEqual(len(self.build()["generated"]), 1)
+
+    def test_page_list_follows_the_page_index(self):
+        write(os.path.join(self.tmp.name, "list.html"), "{{ Pages }}")
+        write(os.path.join(self.content, "index.md"), "---\ntemplate: list.html\n---\n# Home")
+        home = os.path.join(self.dest, "index.html")
+        self.build()
+        with open(home, encoding="utf-8") as f:
+            self.assertIn('<a href="/blog/post/">Post</a>', f.read())
+
+        # A page added after the list was rendered still shows up in it
+        write(os.path.join(self.content, "blog", "new.md"), "# New")
+        new = os.path.join(self.dest, "blog", "new.html")
+        planned = check_site(self.content, self.static, self.template, self.dest)["pages"]
+        self.assertEqual(planned, [os.path.join("blog", "new.md"), "index.md"])
+        self.assertEqual(sorted(self.build()["generated"]), sorted([home, new]))
+        with open(home, encoding="utf-8") as f:
+            self.assertIn('<a href="/blog/new.html">New</a>', f.read())
+
+        # Edits that leave every title and date alone keep the list
+        post = os.path.join(self.dest, "blog", "post", "index.html")
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nEdited")
+        self.assertEqual(self.build()["generated"], [post])
+
+        os.remove(os.path.join(self.content, "blog", "new.md"))
+        self.assertEqual(self.build()["generated"], [home])
+        with open(home, encoding="utf-8") as f:
+            self.assertNotIn("New", f.read())
+
+    def test_changed_image_regenerates_pages_using_it(self):
+        write(os.path.join(self.content, "index.md"), "# Home\n\n![logo](/logo.gif)")
+        with open(os.path.join(self.static, "logo.gif"), "wb") as f:
+            f.write(b"GIF89a\x10\x00\x08\x00" + b"\x00" * 20)
+        self.build()
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertIn('width="16" height="8" loading="lazy"', f.read())
+        with open(os.path.join(self.static, "logo.gif"), "wb") as f:
+            f.write(b"GIF89a\x20\x00\x08\x00" + b"\x00" * 20)
+        self.assertEqual(self.build()["generated"], [os.path.join(self.dest, "index.html")])
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertIn('width="32"', f.read())
+
+    def test_explain(self):
+        write(os.path.join(self.content, "index.md"), "# Home\n\n[style](/index.css) [post](/blog/post/)")
+        self.build()
+        source = os.path.join(self.content, "index.md")
+        lines = explain(os.path.join(self.dest, "index.html"), self.content, self.static, self.dest)
+        self.assertEqual(
+            lines,
+            [
+                f"{source} -> {os.path.join(self.dest, 'index.html')}",
+                f"  template: {self.template}",
+                f"  asset: {os.path.join(self.static, 'index.css')}",
+            ],
+        )
+        lines = explain(self.template, self.content, self.static, self.dest)
+        self.assertEqual(lines[0], f"{self.template} (template) is used by 2 page(s):")
+        asset = os.path.join(self.static, "index.css")
+        lines = explain(asset, self.content, self.static, self.dest)
+        self.assertEqual(lines, [f"{asset} (asset) is used by 1 page(s):", f"  {source}"])
+
+    def test_missing_page_index_regenerates_pages(self):
+        self.build()
+        os.remove(os.path.join(self.dest, PAGE_INDEX_FILE))
+        result = self.build()
+        self.assertEqual(len(result["generated"]), 2)
+        self.assertEqual(len(result["index"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -191,6 +191,47 @@ class TestInlineMarkdown(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_underscores_in_link_url(self):
+        nodes = text_to_textnodes("See [the guide](https://example.com/getting_started_now) _now_")
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the guide", TextType.LINK, "https://example.com/getting_started_now"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("now", TextType.ITALIC),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_delimiters_in_link_text(self):
+        # Chaining the splitters gave "[", bold "x" and "](u)" here
+        self.assertListEqual(
+            [TextNode("**x**", TextType.LINK, "u")],
+            text_to_textnodes("[**x**](u)"),
+        )
+
+    def test_text_to_textnodes_unclosed_delimiter(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **not closed")
+        with self.assertRaises(ValueError):
+            text_to_textnodes("A `code span and a [link](https://boot.dev)")
+
+    def test_text_to_textnodes_many_links(self):
+        text = " ".join(f"[link {i}](/page/{i})" for i in range(300))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 599)
+        self.assertEqual(nodes[-1], TextNode("link 299", TextType.LINK, "/page/299"))
+
+    def test_split_links_skips_image_with_same_literal(self):
+        node = TextNode("![x](/a.png) then [x](/a.png)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("![x](/a.png) then ", TextType.TEXT),
+                TextNode("x", TextType.LINK, "/a.png"),
+            ],
+            split_nodes_link([node]),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
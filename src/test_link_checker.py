@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fixtures import write
+from htmlnode import LeafNode, ParentNode
+from incremental import build_site
+from link_checker import (
+    check_links,
+    link_paths,
+    link_target,
+    linked_paths,
+    output_paths,
+    page_links,
+    served_path,
+)
+
+TEMPLATE = '<title>{{ Title }}</title><main id="top">{{ Content }}</main>'
+
+
+def page(path, links=(), anchors=()):
+    return {"path": path, "links": [[url, None] for url in links], "anchors": list(anchors)}
+
+
+class TestPageLinks(unittest.TestCase):
+    def test_internal_links_with_lines_and_anchors(self):
+        markdown = "# Title\n\nSee [a](/a) and [b](b.html)\n\n[out](https://example.com)\n\n![img](/i.png)"
+        node = ParentNode(
+            "div",
+            [
+                ParentNode(
+                    "p",
+                    [
+                        LeafNode("a", "a", {"href": "/a"}),
+                        LeafNode("a", "b", {"href": "b.html", "id": "second"}),
+                    ],
+                ),
+                LeafNode("a", "out", {"href": "https://example.com"}),
+                LeafNode("img", "", {"src": "/i.png", "alt": "img", "id": "first"}),
+            ],
+        )
+        links, anchors = page_links(node, markdown, first_line=4)
+        self.assertEqual(links, [["/a", 6], ["b.html", 6], ["/i.png", 10]])
+        self.assertEqual(anchors, ["first", "second"])
+        self.assertEqual(page_links(node)[0][0], ["/a", None])
+
+    def test_link_target(self):
+        self.assertEqual(link_target("/blog/tom#intro", "/"), ("/blog/tom", "intro"))
+        self.assertEqual(link_target("../about.html", "/blog/tom/"), ("/blog/about.html", ""))
+        self.assertEqual(link_target("next/", "/blog/tom/"), ("/blog/tom/next/", ""))
+        self.assertEqual(link_target("#top", "/about.html"), ("/about.html", "top"))
+        self.assertEqual(link_target("/a%20b.png", "/"), ("/a b.png", ""))
+        self.assertIsNone(link_target("https://example.com/", "/"))
+        self.assertIsNone(link_target("mailto:me@example.com", "/"))
+
+    def test_served_path(self):
+        outputs = {"/blog/tom/", "/about.html", "/index.css"}
+        self.assertEqual(served_path("/blog/tom", outputs), "/blog/tom/")
+        self.assertEqual(served_path("/about", outputs), "/about.html")
+        self.assertEqual(served_path("/index.css", outputs), "/index.css")
+        self.assertIsNone(served_path("/blog/", outputs))
+
+
+class TestCheckLinks(unittest.TestCase):
+    def test_missing_pages_files_and_anchors(self):
+        index = {
+            "index.md": page("/", ["/blog/tom/index.html#top", "/blog/tom#nope", "/gone", "/index.css"]),
+            os.path.join("blog", "tom", "index.md"): page("/blog/tom/", ["../../#top"], ["top"]),
+        }
+        outputs = output_paths(index, ["index.css"], ["/search_index.json"])
+        self.assertIn("/blog/tom/index.html", outputs)
+        self.assertEqual(
+            check_links(list(index), index, outputs),
+            {
+                "index.md": [
+                    [None, "/blog/tom#nope", "no element with id 'nope'"],
+                    [None, "/gone", "no such page or file"],
+                ],
+                os.path.join("blog", "tom", "index.md"): [[None, "../../#top", "no element with id 'top'"]],
+            },
+        )
+
+    def test_linked_paths(self):
+        entry = page("/blog/", ["tom", "/about.html", "./", "tom#intro"])
+        self.assertEqual(linked_paths(entry), ["/about.html", "/blog/", "/blog/tom"])
+
+    def test_link_paths_invert_served_path(self):
+        outputs = {"/blog/tom/", "/about.html", "/"}
+        for output in outputs:
+            for path in link_paths(output):
+                self.assertEqual(served_path(path, outputs), output)
+        self.assertEqual(link_paths("/"), {"/"})
+
+
+class TestBuildLinkCheck(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self.dest = os.path.join(root, "docs")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nRead [the post](/blog/post#top)")
+        write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n![logo](/logo.png)")
+        write(os.path.join(self.static, "logo.png"), "png")
+        write(self.template, TEMPLATE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        return build_site(self.content, self.static, self.template, self.dest)
+
+    def test_broken_links_follow_their_targets(self):
+        self.assertEqual(self.build()["broken_links"], [])
+
+        # Moving the post breaks the link on the unchanged home page
+        os.rename(os.path.join(self.content, "blog", "post"), os.path.join(self.content, "blog", "moved"))
+        result = self.build()
+        self.assertEqual(len(result["generated"]), 1)
+        self.assertEqual(
+            result["broken_links"],
+            [(os.path.join(self.content, "index.md"), 3, "/blog/post#top", "no such page or file")],
+        )
+        self.assertEqual(self.build()["broken_links"], result["broken_links"])
+
+        os.remove(os.path.join(self.static, "logo.png"))
+        self.assertEqual(
+            self.build()["broken_links"],
+            [
+                (os.path.join(self.content, "blog", "moved", "index.md"), 3, "/logo.png", "no such page or file"),
+                (os.path.join(self.content, "index.md"), 3, "/blog/post#top", "no such page or file"),
+            ],
+        )
+
+        write(os.path.join(self.content, "blog", "post.md"), "# Post again")
+        self.assertEqual(len(self.build()["broken_links"]), 1)
+
+    def test_unchanged_build_parses_no_links(self):
+        self.build()
+        with mock.patch("link_checker.link_target", side_effect=AssertionError):
+            self.assertEqual(self.build()["broken_links"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
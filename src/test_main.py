@@ -0,0 +1,133 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import main
+from fixtures import write
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_arguments_without_a_command_build(self):
+        args = main.parse_args(["/static_site/"])
+        self.assertEqual((args.command, args.base_path), ("build", "/static_site/"))
+        args = main.parse_args(["--watch", "--port", "9000"])
+        self.assertEqual((args.command, args.watch, args.port), ("build", True, 9000))
+        self.assertEqual(main.parse_args([]).command, "build")
+
+    def test_commands(self):
+        args = main.parse_args(["check", "/static_site/", "--minify"])
+        self.assertEqual((args.command, args.base_path, args.minify), ("check", "/static_site/", True))
+        self.assertEqual(main.parse_args(["list"]).command, "list")
+        self.assertTrue(main.parse_args(["clean", "--cache"]).cache)
+
+
+class TestCommands(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        write(os.path.join(main.CONTENT_DIR, "index.md"), "# Home\n\nWelcome")
+        write(os.path.join(main.CONTENT_DIR, "blog", "post", "index.md"), "# Post\n\nBody")
+        write(os.path.join(main.STATIC_DIR, "index.css"), "body {}")
+        write(main.TEMPLATE_FILE, TEMPLATE)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def run_main(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main.main(list(argv))
+        return output.getvalue()
+
+    def test_check_reports_what_a_build_would_do(self):
+        with self.assertRaises(SystemExit):
+            self.run_main("check")
+        self.run_main("build", "--no-cache")
+        self.assertIn("up to date", self.run_main("check"))
+        with self.assertRaises(SystemExit):
+            self.run_main("check", "/static_site/")
+
+        write(os.path.join(main.CONTENT_DIR, "index.md"), "# Home\n\nEdited")
+        os.remove(os.path.join(main.CONTENT_DIR, "blog", "post", "index.md"))
+        # Static files are hardlinked into the output, so replace rather than edit
+        os.remove(os.path.join(main.STATIC_DIR, "index.css"))
+        write(os.path.join(main.STATIC_DIR, "index.css"), "body { margin: 0 }")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit):
+            main.main(["check"])
+        self.assertEqual(
+            output.getvalue().splitlines(),
+            [
+                "1 pages to generate:",
+                f"  {os.path.join('content', 'index.md')}",
+                "1 pages to remove:",
+                f"  {os.path.join('content', 'blog', 'post', 'index.md')}",
+                "1 static files to copy:",
+                f"  {os.path.join('static', 'index.css')}",
+            ],
+        )
+        self.run_main("build", "--incremental", "--no-cache")
+        self.assertIn("up to date", self.run_main("check"))
+
+    def test_watched_paths_include_partials_the_build_used(self):
+        write(main.TEMPLATE_FILE, "{{> partials/nav.html }}" + TEMPLATE)
+        write(os.path.join("partials", "nav.html"), "<nav></nav>")
+        self.assertNotIn(os.path.join("partials", "nav.html"), main.watched_paths())
+        self.run_main("build", "--no-cache")
+        self.assertEqual(
+            main.watched_paths(),
+            [main.CONTENT_DIR, main.STATIC_DIR, main.TEMPLATE_FILE, os.path.join("partials", "nav.html")],
+        )
+
+    def test_profile_parses_pages_past_a_filled_cache(self):
+        self.run_main("build")
+        self.run_main("build", "--profile", "profile.json")
+        with open("profile.json", encoding="utf-8") as f:
+            phases = json.load(f)["phases"]
+        self.assertIn("inline", phases)
+        self.assertIn("net_blocks", phases["inline"])
+
+    def test_list_and_clean(self):
+        self.run_main("build", "--no-cache")
+        write(os.path.join(main.CONTENT_DIR, "about.md"), "# About")
+        self.assertEqual(
+            self.run_main("list").splitlines(),
+            [
+                f"/about.html\t{os.path.join('content', 'about.md')}\t",
+                f"/blog/post/\t{os.path.join('content', 'blog', 'post', 'index.md')}\tPost",
+                f"/\t{os.path.join('content', 'index.md')}\tHome",
+            ],
+        )
+        os.makedirs(main.CACHE_DIR)
+        self.run_main("clean")
+        self.assertFalse(os.path.exists(main.OUTPUT_DIR))
+        self.assertTrue(os.path.exists(main.CACHE_DIR))
+        self.run_main("clean", "--cache")
+        self.assertFalse(os.path.exists(main.CACHE_DIR))
+
+    def test_quick_commands_do_not_load_the_parser(self):
+        self.run_main("build", "--no-cache")
+        script = (
+            f"import sys; sys.path.insert(0, {SRC_DIR!r}); import main; "
+            "main.main(sys.argv[1:]); "
+            "print(sorted(set(sys.modules) & {'markdown_blocks', 'inline_markdown', 'htmlnode'}))"
+        )
+        for argv in (["list"], ["check"], ["build", "--incremental"]):
+            result = subprocess.run(
+                [sys.executable, "-c", script, *argv], capture_output=True, text=True, check=True
+            )
+            self.assertEqual(result.stdout.splitlines()[-1], "[]", argv)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,17 @@
+import io
 import unittest
 from markdown_blocks import (
+    iter_block_lines,
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
     BlockType,
+    code_to_html_node,
+    heading_to_html_node,
+    olist_to_html_node,
+    paragraph_to_html_node,
+    quote_to_html_node,
+    ulist_to_html_node,
 )
 
 
@@ -51,6 +59,24 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_iter_block_lines_strips_blocks(self):
+        md = "  \n  first line\nsecond  \n   \n\n\n\n   \n\n- item\n\n\n"
+        self.assertEqual(
+            list(iter_block_lines(md)),
+            [["first line", "second"], ["- item"]],
+        )
+
+    def test_markdown_to_html_node_from_file_object(self):
+        md = "# Title\n\n- one\n- two\n\n```\ncode\n```\n"
+        self.assertEqual(
+            markdown_to_html_node(io.StringIO(md)).to_html(),
+            markdown_to_html_node(md).to_html(),
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><h1>Title</h1><ul><li>one</li><li>two</li></ul><pre><code>code\n</code></pre></div>",
+        )
+
     def test_block_to_block_types(self):
         block = "# heading"
         self.assertEqual(block_to_block_type(block), BlockType.HEADING)
@@ -65,6 +91,14 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_block_functions_take_strings(self):
+        self.assertEqual(paragraph_to_html_node("one\n**two**").to_html(), "<p>one <b>two</b></p>")
+        self.assertEqual(heading_to_html_node("## Title").to_html(), "<h2>Title</h2>")
+        self.assertEqual(code_to_html_node("```\ncode\n```").to_html(), "<pre><code>code\n</code></pre>")
+        self.assertEqual(olist_to_html_node("1. a\n2. b").to_html(), "<ol><li>a</li><li>b</li></ol>")
+        self.assertEqual(ulist_to_html_node("- a\n- b").to_html(), "<ul><li>a</li><li>b</li></ul>")
+        self.assertEqual(quote_to_html_node("> a\n> b").to_html(), "<blockquote>a b</blockquote>")
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import markdown_parser
+from htmlnode import LeafNode, ParentNode
+from markdown_parser import extract_title, generate_page, prefix_root_links
+
+
+class TestMarkdownParser(unittest.TestCase):
+    def test_extract_title(self):
+        self.assertEqual(extract_title("intro\n\n#  Hello  \n## sub"), "Hello")
+
+    def test_extract_title_missing(self):
+        with self.assertRaises(ValueError):
+            extract_title("## only an h2")
+
+    def test_prefix_root_links(self):
+        node = ParentNode(
+            "div",
+            [
+                LeafNode("a", "home", {"href": "/"}),
+                ParentNode("p", [LeafNode("img", "", {"src": "/images/a.png", "alt": "a"})]),
+                LeafNode("a", "ext", {"href": "https://example.com/"}),
+                LeafNode("a", "cdn", {"href": "//cdn.example.com/"}),
+            ],
+        )
+        prefix_root_links(node, "/static_site/")
+        self.assertEqual(
+            node.to_html(),
+            '<div><a href="/static_site/">home</a><p><img src="/static_site/images/a.png" alt="a"></img></p>'
+            '<a href="https://example.com/">ext</a><a href="//cdn.example.com/">cdn</a></div>',
+        )
+
+
+    def test_large_page_streaming_matches_regular_path(self):
+        markdown = (
+            "---\r\nauthor: Ann\r\n---\r\nIntro text\r\n\r\n# Big [page](/x)\n\n"
+            + "\n\n".join(f"Paragraph {i} with a [link](/p/{i})" for i in range(50))
+            + "\n\n```\ncode\n```"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, "w", encoding="utf-8", newline="") as f:
+                f.write(markdown)
+            with open(template, "w", encoding="utf-8") as f:
+                f.write('<title>{{ Title }}</title><a href="/">home</a>{{ Author }}{{ Content }}')
+            regular = os.path.join(tmp, "regular", "index.html")
+            streamed = os.path.join(tmp, "streamed", "index.html")
+            entry = generate_page(source, template, regular, "/site/")
+            with mock.patch.object(markdown_parser, "LARGE_FILE_THRESHOLD", 0):
+                streamed_entry = generate_page(source, template, streamed, "/site/")
+            with open(regular, encoding="utf-8") as f:
+                expected = f.read()
+            with open(streamed, encoding="utf-8") as f:
+                self.assertEqual(f.read(), expected)
+        self.assertIn('<a href="/site/p/49">link</a>', expected)
+        self.assertIn("Ann<div>", expected)
+        # Streamed pages keep no source text to find link lines in
+        self.assertEqual([url for url, line in streamed_entry.pop("links")], [url for url, line in entry["links"]])
+        self.assertEqual(entry.pop("links")[:2], [["/x", 6], ["/p/0", 8]])
+        self.assertEqual(streamed_entry, entry)
+        self.assertEqual(entry["meta"], {"author": "Ann"})
+        self.assertEqual(entry["word_count"], 2 + 2 + 5 * 50 + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import markdown_parser
+from fixtures import write
+from markdown_parser import generate_pages
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.template = os.path.join(root, "template.html")
+        write(self.template, "<title>{{ Title }}</title>\n  <main>{{ Content }}</main>")
+        self.pages = []
+        for i in range(12):
+            source = os.path.join(root, "content", f"page{i}.md")
+            write(source, f"# Page {i}\n\n- item **{i}** [link](/p/{i})\n\n```\ncode  {i}\n```")
+            self.pages.append((source, os.path.join(root, "docs", f"page{i}.html")))
+        self.pages.append((os.path.join(root, "content", "missing.md"), os.path.join(root, "docs", "x.html")))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def outputs(self):
+        outputs = {}
+        for source, dest in self.pages:
+            if os.path.exists(dest):
+                with open(dest, encoding="utf-8") as f:
+                    outputs[dest] = f.read()
+                os.remove(dest)
+        return outputs
+
+    def test_matches_regular_build(self):
+        for minify in (False, True):
+            regular = generate_pages(self.pages, self.template, "/site/", minify=minify)
+            expected = self.outputs()
+            pipelined = generate_pages(self.pages, self.template, "/site/", 3, minify=minify, pipeline=True)
+            self.assertEqual(self.outputs(), expected)
+            self.assertEqual(pipelined, regular)
+        self.assertEqual(len(expected), 12)
+        self.assertEqual(len(regular["errors"]), 1)
+        self.assertEqual(regular["errors"][0][0], self.pages[-1][0])
+
+    def test_large_sources_are_streamed_by_workers(self):
+        pages = self.pages[:3]
+        generate_pages(pages, self.template)
+        expected = self.outputs()
+        with mock.patch.object(markdown_parser, "LARGE_FILE_THRESHOLD", 0):
+            result = generate_pages(pages, self.template, jobs=2, pipeline=True)
+        self.assertEqual(self.outputs(), expected)
+        self.assertEqual(result["written"], 3)
+
+    def test_undecodable_source_fails_only_its_page(self):
+        source = os.path.join(self.tmp.name, "content", "latin1.md")
+        with open(source, "wb") as f:
+            f.write("# Caf\xe9".encode("latin-1"))
+        pages = self.pages[:2] + [(source, os.path.join(self.tmp.name, "docs", "latin1.html"))]
+        regular = generate_pages(pages, self.template)
+        self.outputs()
+        pipelined = generate_pages(pages, self.template, jobs=2, pipeline=True)
+        self.assertEqual(len(self.outputs()), 2)
+        self.assertEqual(pipelined, regular)
+        self.assertEqual(pipelined["errors"][0][0], source)
+        self.assertIn("UnicodeDecodeError", pipelined["errors"][0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
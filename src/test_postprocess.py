@@ -0,0 +1,71 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from postprocess import minify_chunks, minify_html, precompress_file, precompress_tree
+
+PAGE = (
+    "<html>\n  <body>\n    <p>a   b</p>\n"
+    "<img  alt=\"two  words\n here\"\n title='a  >  b'>  don't   stop's\n"
+    "<pre><code>x\n   y  </code></pre>  <p>c\n\n d</p>"
+    '<PRE class="x">  q\n  </PRE>\n</body>'
+)
+
+
+class TestMinify(unittest.TestCase):
+    def test_collapses_whitespace_outside_pre(self):
+        self.assertEqual(
+            minify_html(PAGE),
+            "<html>\n<body>\n<p>a b</p>\n"
+            "<img alt=\"two  words\n here\"\ntitle='a  >  b'> don't stop's\n<pre><code>x\n   y  </code></pre> <p>c\nd</p>"
+            '<PRE class="x">  q\n  </PRE>\n</body>',
+        )
+
+    def test_chunk_boundaries_do_not_matter(self):
+        expected = minify_html(PAGE)
+        for size in range(1, 12):
+            chunks = [PAGE[i : i + size] for i in range(0, len(PAGE), size)]
+            self.assertEqual("".join(minify_chunks(chunks)), expected)
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_writes_gzip_sibling_once(self):
+        path = self.write("index.html", b"<p>hello</p>" * 100)
+        self.assertGreaterEqual(precompress_file(path), 1)
+        with gzip.open(path + ".gz") as f:
+            self.assertEqual(f.read(), b"<p>hello</p>" * 100)
+        self.assertEqual(precompress_file(path), 0)
+
+    def test_tree_skips_up_to_date_and_removes_stale(self):
+        self.write("index.html", b"<p>hi</p>")
+        self.write("app.js", b"run()")
+        self.write("photo.png", b"\x89PNG")
+        self.write("archive.tar.gz", b"keep")
+        self.write("old.html.gz", b"stale")
+        self.write(".manifest.json", b"{}")
+        result = precompress_tree(self.root, jobs=2)
+        self.assertGreaterEqual(result["compressed"], 2)
+        self.assertEqual(result["removed"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "app.js.gz")))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "archive.tar.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "photo.png.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, ".manifest.json.gz")))
+        self.assertEqual(precompress_tree(self.root)["compressed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
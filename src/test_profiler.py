@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+import markdown_blocks
+from incremental import build_site
+from markdown_parser import generate_page
+from profiler import BuildProfiler
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_phase_records_totals_and_current_page(self):
+        profiler = BuildProfiler()
+        with profiler.phase("walk"):
+            pass
+        profiler.page = "a.md"
+        with profiler.phase("read"):
+            pass
+        with profiler.phase("read"):
+            pass
+        self.assertEqual(profiler.totals["walk"]["calls"], 1)
+        self.assertEqual(profiler.totals["read"]["calls"], 2)
+        self.assertEqual(list(profiler.pages), ["a.md"])
+        self.assertEqual(list(profiler.pages["a.md"]), ["read"])
+
+    def test_instrument_restores_functions(self):
+        profiler = BuildProfiler()
+        original = markdown_blocks.lines_to_block_type
+        phases = {"lines_to_block_type": "block_type", "iter_block_lines": "blocks"}
+        with profiler.instrument(markdown_blocks, phases):
+            self.assertIsNot(markdown_blocks.lines_to_block_type, original)
+            markdown_blocks.markdown_to_html_node("# one\n\ntwo")
+        self.assertIs(markdown_blocks.lines_to_block_type, original)
+        self.assertEqual(profiler.totals["block_type"]["calls"], 2)
+        # One timed step per block plus the final one that ends the scan
+        self.assertEqual(profiler.totals["blocks"]["calls"], 3)
+
+    def test_failed_page_is_not_left_as_current(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "untitled.md")
+            with open(source, "w") as f:
+                f.write("no title")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            profiler = BuildProfiler()
+            with self.assertRaises(ValueError):
+                generate_page(source, template, os.path.join(tmp, "untitled.html"), profiler=profiler)
+        self.assertIsNone(profiler.page)
+
+    def test_profiled_build_reports_every_page_phase(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Home\n\nSome **bold** text\n\n- a list")
+            template = os.path.join(tmp, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Title }}{{ Content }}")
+            profiler = BuildProfiler()
+            build_site(content, os.path.join(tmp, "static"), template, os.path.join(tmp, "docs"), profiler=profiler)
+            report_path = os.path.join(tmp, "profile.json")
+            profiler.save(report_path)
+            with open(report_path) as f:
+                report = json.load(f)
+        page = report["pages"][os.path.join(content, "index.md")]
+        self.assertEqual(
+            sorted(page["phases"]),
+            sorted(
+                ["read", "markdown_to_blocks", "block_to_block_type", "inline", "to_html", "template", "write"]
+            ),
+        )
+        self.assertIn("walk", report["phases"])
+        self.assertEqual(profiler.slowest(1)[0][0], os.path.join(content, "index.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
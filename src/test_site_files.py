@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+from page_index import page_entry, render_page_list
+from site_files import (
+    SUMMARY_LENGTH,
+    TextStats,
+    build_search_index,
+    render_feed,
+    render_sitemap,
+)
+
+
+def entry(path, title, terms=(), date=None, tags=()):
+    meta = {"date": date, "tags": list(tags)} if date else {"tags": list(tags)}
+    page = page_entry(meta, title, len(terms), terms, f"About {title}")
+    page["path"] = path
+    return page
+
+
+class TestTextStats(unittest.TestCase):
+    def test_counts_words_and_terms(self):
+        stats = TextStats().add(["Tom Bombadil, ", "tom's ", "snake_case 42"])
+        self.assertEqual(stats.word_count, 5)
+        self.assertEqual(stats.terms, {"tom", "bombadil", "snake", "case", "42"})
+        self.assertEqual(stats.summary(), "Tom Bombadil, tom's snake_case 42")
+
+    def test_summary_is_truncated_on_a_word(self):
+        stats = TextStats().add(["word " * 100, "later text"])
+        summary = stats.summary()
+        self.assertLessEqual(len(summary), SUMMARY_LENGTH + 1)
+        self.assertTrue(summary.endswith("word…"))
+
+
+class TestSiteFiles(unittest.TestCase):
+    def setUp(self):
+        self.index = {
+            "index.md": entry("/", "Home", ["tolkien", "welcome"]),
+            os.path.join("blog", "a", "index.md"): entry(
+                "/blog/a/", "A & B", ["tolkien"], "2024-01-02", ["lore"]
+            ),
+            os.path.join("blog", "b", "index.md"): entry("/blog/b/", "Later", ["elves"], "2024-03-04"),
+        }
+
+    def test_search_index_is_delta_encoded(self):
+        search = json.loads(build_search_index(self.index, "/site/"))
+        self.assertEqual(
+            search["pages"],
+            [["/site/blog/a/", "A & B"], ["/site/blog/b/", "Later"], ["/site/", "Home"]],
+        )
+        self.assertEqual(search["terms"], {"elves": [1], "tolkien": [0, 2], "welcome": [2]})
+
+    def test_sitemap(self):
+        sitemap = render_sitemap(self.index, "https://example.com/", "/site/")
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<lastmod>2024-03-04</lastmod>", sitemap)
+
+    def test_page_list_is_newest_first(self):
+        self.assertEqual(
+            render_page_list(self.index, "/site/"),
+            '<ul class="pages">'
+            '<li><a href="/site/blog/b/">Later</a> <time datetime="2024-03-04">2024-03-04</time></li>'
+            '<li><a href="/site/blog/a/">A &amp; B</a> <time datetime="2024-01-02">2024-01-02</time></li>'
+            '<li><a href="/site/">Home</a></li>'
+            "</ul>",
+        )
+
+    def test_feed_lists_posts_newest_first(self):
+        with tempfile.TemporaryDirectory() as content_dir:
+            feed = render_feed(self.index, content_dir, "https://example.com")
+        self.assertIn("<updated>2024-03-04T00:00:00Z</updated>", feed)
+        self.assertLess(feed.index("<title>Later</title>"), feed.index("<title>A &amp; B</title>"))
+        self.assertIn('<category term="lore"/>', feed)
+        self.assertIn("<summary>About Later</summary>", feed)
+        self.assertNotIn("Home", feed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+from fixtures import write
+from template import Template, TemplateLoader, compile_template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_segments_and_slots(self):
+        template = compile_template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template,
+            Template(["<title>", "", "</title><main>", "", "</main>"], [(1, "Title"), (3, "Content")]),
+        )
+
+    def test_render(self):
+        template = compile_template("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>body</p>"),
+            "<h1>Hi</h1><p>body</p>",
+        )
+
+    def test_iter_render_streams_iterables(self):
+        template = compile_template("<h1>{{ Title }}</h1>{{ Content }}<footer>")
+        chunks = list(template.iter_render(Title="Hi", Content=iter(["<p>", "body", "</p>"])))
+        self.assertEqual(chunks, ["<h1>", "Hi", "</h1>", "<p>", "body", "</p>", "<footer>"])
+
+    def test_render_repeated_and_missing_slots(self):
+        template = compile_template("{{ Title }}|{{ Title }}|{{ Missing }}")
+        self.assertEqual(template.render(Title="x"), "x|x|")
+
+    def test_base_path_rewrites_template_links(self):
+        template = compile_template(
+            '<link href="/index.css"><script src="/app.js"></script>'
+            '<a href="//cdn.example.com/x">cdn</a>{{ Content }}',
+            "/static_site/",
+        )
+        self.assertEqual(
+            template.render(Content='<a href="/blog">blog</a>'),
+            '<link href="/static_site/index.css"><script src="/static_site/app.js"></script>'
+            '<a href="//cdn.example.com/x">cdn</a><a href="/blog">blog</a>',
+        )
+
+    def test_base_path_placeholder(self):
+        template = compile_template('<a href="{{ BasePath }}/about">{{ Title }}</a>', "/site/")
+        self.assertEqual(template.render(Title="About"), '<a href="/site/about">About</a>')
+        template = compile_template('<a href="{{ BasePath }}/about">x</a>')
+        self.assertEqual(template.render(), '<a href="/about">x</a>')
+
+
+class TestPartials(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_partials_are_expanded_and_recorded(self):
+        page = os.path.join(self.root, "page.html")
+        write(page, '{{> partials/head.html }}<main>{{ Content }}</main>{{> partials/head.html }}')
+        write(os.path.join(self.root, "partials", "head.html"), '<link href="/a.css">{{> title.html }}')
+        write(os.path.join(self.root, "partials", "title.html"), "<title>{{ Title }}</title>")
+        template = load_template(page, "/site/")
+        self.assertEqual(
+            template.render(Title="T", Content="C"),
+            '<link href="/site/a.css"><title>T</title><main>C</main><link href="/site/a.css"><title>T</title>',
+        )
+        self.assertEqual(
+            template.dependencies,
+            (
+                os.path.normpath(page),
+                os.path.join(self.root, "partials", "head.html"),
+                os.path.join(self.root, "partials", "title.html"),
+            ),
+        )
+        self.assertEqual(template.links, ("/a.css", "/a.css"))
+
+    def test_include_cycle(self):
+        write(os.path.join(self.root, "a.html"), "{{> b.html }}")
+        write(os.path.join(self.root, "b.html"), "{{> a.html }}")
+        with self.assertRaisesRegex(ValueError, "include cycle"):
+            load_template(os.path.join(self.root, "a.html"))
+
+    def test_loader_compiles_once(self):
+        path = os.path.join(self.root, "a.html")
+        write(path, "{{ Title }}")
+        loader = TemplateLoader("/")
+        self.assertIs(loader.load(path), loader.load(os.path.join(self.root, ".", "a.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
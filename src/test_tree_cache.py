@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from tree_cache import TreeCache
+from htmlnode import HTMLNode
+from markdown_blocks import markdown_to_html_node
+
+MARKDOWN = """
+# Title
+
+Shared **footer** text
+
+- a list
+- of items
+
+Shared **footer** text
+"""
+
+
+class TestTreeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "trees.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tree_matches_parsing(self):
+        cache = TreeCache(self.path, 1)
+        html = cache.tree(MARKDOWN, markdown_to_html_node).to_html()
+        self.assertEqual(html, markdown_to_html_node(MARKDOWN).to_html())
+        self.assertEqual(cache.tree(MARKDOWN, markdown_to_html_node).to_html(), html)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+
+    def test_parser_version_is_part_of_key(self):
+        cache = TreeCache(self.path, 1)
+        cache.tree("a paragraph", markdown_to_html_node)
+        cache.close()
+        cache = TreeCache(self.path, 2)
+        cache.tree("a paragraph", markdown_to_html_node)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        cache.close()
+
+    def test_evicts_least_recently_used(self):
+        cache = TreeCache(self.path, 1)
+        for i in range(3):
+            cache.tree(f"paragraph {i}", markdown_to_html_node)
+        entry_size = cache.size() // 3
+        cache.tree("paragraph 0", markdown_to_html_node)
+        cache.max_bytes = entry_size * 2
+        self.assertEqual(cache.evict(), 1)
+        cache.tree("paragraph 0", markdown_to_html_node)
+        cache.tree("paragraph 1", markdown_to_html_node)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        cache.close()
+
+    def test_drops_the_old_block_table(self):
+        os.makedirs(os.path.dirname(self.path))
+        connection = sqlite3.connect(self.path)
+        connection.execute("CREATE TABLE blocks (key TEXT PRIMARY KEY, data BLOB)")
+        connection.commit()
+        connection.close()
+        TreeCache(self.path, 1).close()
+        connection = sqlite3.connect(self.path)
+        tables = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        connection.close()
+        self.assertEqual(tables, [("trees",)])
+
+    def test_page_trees_are_cached_whole(self):
+        cache = TreeCache(self.path, 1)
+        parses = []
+
+        def parse(markdown):
+            parses.append(markdown)
+            return markdown_to_html_node(markdown)
+
+        first = cache.tree(MARKDOWN, parse)
+        cache.close()
+        cache = TreeCache(self.path, 1)
+        second = cache.tree(MARKDOWN, parse)
+        self.assertEqual(len(parses), 1)
+        self.assertEqual(second.to_html(), first.to_html())
+        self.assertIsNot(cache.tree(MARKDOWN, parse), second)
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+        cache.close()
+
+    def test_trees_it_cannot_encode_are_not_stored(self):
+        cache = TreeCache(self.path, 1)
+        node = cache.tree("text", lambda markdown: HTMLNode("p", markdown))
+        self.assertEqual(node.value, "text")
+        cache.tree("text", lambda markdown: HTMLNode("p", markdown))
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import struct
+import sys
+import unittest
+
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from markdown_blocks import markdown_to_html_node
+from tree_codec import HEADER, decode_tree, encode_tree
+
+MARKDOWN = """
+# Title
+
+A **bold** and _italic_ [link](/about) with ![alt](/images/x.png), then
+another [link](/about).
+
+```
+code & <tags>
+```
+
+> quote
+
+- one
+- two
+
+1. first
+2. second
+"""
+
+
+class TestTreeCodec(unittest.TestCase):
+    def test_round_trips_rendered_markdown(self):
+        node = markdown_to_html_node(MARKDOWN)
+        decoded = decode_tree(encode_tree(node))
+        self.assertEqual(repr(decoded), repr(node))
+        self.assertEqual(decoded.to_html(), node.to_html())
+
+    def test_round_trips_edge_cases(self):
+        trees = [
+            LeafNode(None, ""),
+            LeafNode("b", None),
+            LeafNode("img", "", {"src": "/x.png", "alt": ""}),
+            ParentNode("div", []),
+            ParentNode("p", [LeafNode(None, "é ✓ 𝄞"), ParentNode("span", [LeafNode("i", "x")], {"class": "a"})]),
+        ]
+        for tree in trees:
+            decoded = decode_tree(encode_tree(tree))
+            self.assertIs(decoded.__class__, tree.__class__)
+            self.assertEqual(repr(decoded), repr(tree))
+
+    def test_decoded_nodes_are_independent(self):
+        node = markdown_to_html_node(MARKDOWN)
+        data = encode_tree(node)
+        first, second = decode_tree(data), decode_tree(memoryview(data))
+        links = [child for child in first.children[1].children if child.tag == "a"]
+        self.assertIsNot(links[0].props, links[1].props)
+        links[0].props["href"] = "/changed"
+        self.assertEqual(second.to_html(), node.to_html())
+        self.assertIs(first.children[0].tag, sys.intern("h1"))
+
+    def test_shares_repeated_strings(self):
+        paragraph = "[link](/about) " * 50
+        data = encode_tree(markdown_to_html_node(paragraph))
+        self.assertEqual(data.count(b"/about"), 1)
+
+    def test_rejects_what_it_cannot_encode(self):
+        with self.assertRaises(TypeError):
+            encode_tree(ParentNode("div", [HTMLNode("p", "x")]))
+        with self.assertRaises(ValueError):
+            encode_tree(LeafNode(None, "a\0b"))
+        with self.assertRaises(ValueError):
+            encode_tree(ParentNode("div", None))
+
+    def test_rejects_other_versions(self):
+        data = bytearray(encode_tree(LeafNode("b", "x")))
+        version = HEADER.unpack_from(data)[1]
+        struct.pack_into("<B", data, 4, version + 1)
+        with self.assertRaises(ValueError):
+            decode_tree(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+from tree_codec import CODEC_VERSION, decode_tree, encode_tree
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_open_caches = {}
+
+
+class TreeCache:
+    """
+    A persistent, content-addressed store of the parse trees of whole
+    markdown documents, kept in SQLite and shared by every page and build
+    process. Entries are keyed by a hash of the parser version and markdown
+    text, and the least recently used ones are evicted once the store grows
+    past max_bytes. Single blocks are not cached: hashing, looking up and
+    unpickling each one cost as much as parsing it again.
+    """
+
+    def __init__(self, path, version, max_bytes=DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        # Left behind by versions that also cached single blocks
+        self.connection.execute("DROP TABLE IF EXISTS blocks")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS trees ("
+            "key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS trees_used ON trees (used)")
+        self.connection.commit()
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.version}\0{text}".encode("utf-8")).hexdigest()
+
+    def tree(self, markdown, parse):
+        """
+        Returns the cached parse tree of a whole document, or parses it with
+        parse(markdown) and stores the result. Trees are kept in the compact
+        tree_codec form, which loads several times faster than parsing;
+        trees it cannot encode are returned without being stored.
+        """
+        key = self.key(f"tree {CODEC_VERSION}\0{markdown}")
+        row = self.connection.execute("SELECT data FROM trees WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.hits += 1
+            self.connection.execute("UPDATE trees SET used = ? WHERE key = ?", (time.time(), key))
+            return decode_tree(row[0])
+        self.misses += 1
+        node = parse(markdown)
+        try:
+            data = encode_tree(node)
+        except (TypeError, ValueError):
+            return node
+        self.connection.execute(
+            "INSERT OR REPLACE INTO trees (key, data, size, used) VALUES (?, ?, ?, ?)",
+            (key, data, len(data), time.time()),
+        )
+        return node
+
+    def size(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM trees").fetchone()[0]
+
+    def evict(self):
+        """
+        Drops least recently used entries until the store fits in max_bytes.
+        Returns the number of entries removed.
+        """
+        excess = self.size() - self.max_bytes
+        doomed = []
+        if excess > 0:
+            rows = self.connection.execute("SELECT key, size FROM trees ORDER BY used")
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+            self.connection.executemany("DELETE FROM trees WHERE key = ?", doomed)
+        self.commit()
+        return len(doomed)
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def open_cache(path, version, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Returns this process's TreeCache for path, opening it on first use.
+    Caches are tracked per process id, so a forked worker never reuses a
+    SQLite connection inherited from its parent.
+    """
+    key = (os.getpid(), path)
+    cache = _open_caches.get(key)
+    if cache is None:
+        cache = TreeCache(path, version, max_bytes)
+        _open_caches[key] = cache
+    return cache
+
+
+def close_cache(path):
+    cache = _open_caches.pop((os.getpid(), path), None)
+    if cache is not None:
+        cache.close()
@@ -0,0 +1,146 @@
+import struct
+import sys
+from array import array
+
+from htmlnode import LeafNode, ParentNode
+
+# Bump whenever the layout below changes, so stale encodings are not read
+CODEC_VERSION = 1
+MAGIC = b"HTRE"
+# magic, version, byte order, then node, tag, props set and prop item counts
+HEADER = struct.Struct("<4sBB2x4I")
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+# Tag and string id 0 stand for None; the value of every ParentNode is PARENT
+PARENT = 0xFFFFFFFF
+# Joins the tag and string tables, so they split apart in one call
+SEPARATOR = "\0"
+_new = object.__new__
+
+
+def encode_tree(node):
+    """
+    Serializes a tree of ParentNode and LeafNode into a compact binary form.
+    Nodes are stored as flat arrays of native 32-bit ints: a tag, value and
+    props set id per node, and a child index array giving where each node's
+    children start. Nodes are numbered in reverse breadth-first order, so a
+    node's children are a run of consecutive numbers below its own. Tag
+    names get their own small table; every other string (text, prop names
+    and values) is kept once in the string table, and identical props
+    dicts share one props set. Raises TypeError
+    for other node classes and ValueError for strings containing NUL.
+    """
+    tag_ids = {None: 0}
+    strings = {None: 0}
+    props_sets = {(): 0}
+    tags = array("I")
+    values = array("I")
+    props = array("I")
+    prop_offsets = array("I", [0, 0])
+    prop_items = array("I")
+
+    def string_id(text):
+        string = strings.get(text)
+        if string is None:
+            string = strings[text] = len(strings)
+        return string
+
+    # Breadth first with each child list reversed, so that reversing the
+    # whole order at the end puts every run of children back in order
+    order = [node]
+    ends = [1]
+    for node in order:
+        node_class = node.__class__
+        if node_class is ParentNode:
+            if node.children is None:
+                raise ValueError("invalid HTML: no children")
+            order.extend(reversed(node.children))
+            values.append(PARENT)
+        elif node_class is LeafNode:
+            values.append(string_id(node.value))
+        else:
+            raise TypeError(f"cannot encode {node_class.__name__}")
+        ends.append(len(order))
+        tag = tag_ids.get(node.tag)
+        if tag is None:
+            tag = tag_ids[node.tag] = len(tag_ids)
+        tags.append(tag)
+        key = tuple(node.props.items()) if node.props else ()
+        props_set = props_sets.get(key)
+        if props_set is None:
+            props_set = props_sets[key] = len(props_sets)
+            for name, value in key:
+                prop_items.append(string_id(name))
+                prop_items.append(string_id(str(value)))
+            prop_offsets.append(len(prop_items))
+        props.append(props_set)
+    for section in (tags, values, props):
+        section.reverse()
+    child_offsets = array("I", (len(order) - end for end in reversed(ends)))
+
+    del tag_ids[None], strings[None]
+    table = [*tag_ids, *strings]
+    blob = SEPARATOR.join(table)
+    if blob.count(SEPARATOR) != len(table) - 1:
+        raise ValueError("cannot encode strings containing NUL")
+
+    header = HEADER.pack(
+        MAGIC, CODEC_VERSION, BYTE_ORDER, len(order), len(tag_ids), len(props_sets), len(prop_items)
+    )
+    sections = (tags, values, props, child_offsets, prop_offsets, prop_items)
+    return b"".join([header, *(section.tobytes() for section in sections), blob.encode("utf-8")])
+
+
+def decode_tree(data):
+    """
+    Rebuilds the tree encoded by encode_tree from bytes or any buffer, such
+    as a database row or a memory-mapped file. Sections are cast straight
+    out of the buffer through memoryview, without copying it into bytes
+    objects, and the string tables are decoded in one go. Raises ValueError for
+    data from another codec version or a machine with another byte order.
+    """
+    view = memoryview(data)
+    magic, version, byte_order, node_count, tag_count, props_count, item_count = HEADER.unpack_from(view)
+    if magic != MAGIC or version != CODEC_VERSION or byte_order != BYTE_ORDER:
+        raise ValueError("not a tree encoded by this codec version")
+    offset = HEADER.size
+
+    def section(count):
+        nonlocal offset
+        start = offset
+        offset += count * 4
+        # tolist() turns the whole run into ints at once, far faster than
+        # reading them one at a time through the view
+        return view[start:offset].cast("I").tolist()
+
+    tags = section(node_count)
+    values = section(node_count)
+    props = section(node_count)
+    child_offsets = section(node_count + 1)
+    prop_offsets = section(props_count + 1)
+    prop_items = section(item_count)
+    table = str(view[offset:], "utf-8").split(SEPARATOR)
+    tag_names = [None, *map(sys.intern, table[:tag_count])]
+    strings = [None, *table[tag_count:]]
+    props_sets = [
+        {strings[prop_items[i]]: strings[prop_items[i + 1]] for i in range(start, end, 2)}
+        for start, end in zip(prop_offsets[:-1], prop_offsets[1:])
+    ]
+
+    # Every node's children come before it, so each is built by the time
+    # its parent is. Nodes are filled in directly, as __init__ would intern
+    # every tag again, and each gets its own copy of its props
+    nodes = []
+    append = nodes.append
+    for tag, value, props_set, start, end in zip(tags, values, props, child_offsets, child_offsets[1:]):
+        if value == PARENT:
+            node = _new(ParentNode)
+            node.value = None
+            node.children = nodes[start:end]
+        else:
+            node = _new(LeafNode)
+            node.value = strings[value]
+            node.children = None
+        node.tag = tag_names[tag]
+        node.props = props_sets[props_set].copy() if props_set else None
+        append(node)
+    return nodes[-1]